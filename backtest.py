@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_HORIZONS = (5, 15, 60)
+
+
+def pattern_arrays(patterns):
+    """
+    Convert find_patterns output (list of dicts) into index arrays.
+
+    Returns:
+        dict with int arrays 'cup_start', 'handle_end', 'breakout' and
+        arrays 'valid', 'invalid_reason' (one entry per pattern).
+    """
+    return {
+        "cup_start": np.array([p["cup_start"] for p in patterns], dtype=np.int64),
+        "handle_end": np.array([p["handle_end"] for p in patterns], dtype=np.int64),
+        "breakout": np.array([p["breakout"] for p in patterns], dtype=np.int64),
+        "valid": np.array([bool(p["valid"]) for p in patterns], dtype=bool),
+        "invalid_reason": np.array([p["invalid_reason"] or "" for p in patterns], dtype=object),
+    }
+
+
+def forward_outcomes(close, high, low, breakout, horizons=DEFAULT_HORIZONS,
+                     target=0.02, stop=0.01):
+    """
+    Forward performance of every pattern at once, entering at the breakout close.
+
+    Args:
+        close, high, low: price arrays of one symbol.
+        breakout: int array of breakout bar indices.
+        horizons: bar counts after the breakout to measure returns at.
+        target, stop: fractional take-profit / stop-loss distances from entry.
+
+    Returns:
+        dict of arrays (one entry per pattern): 'entry', 'ret_<h>', 'mfe_<h>',
+        'mae_<h>' for each horizon, 'target_bars', 'stop_bars' (bars until
+        first hit, NaN if never) and 'outcome' ('target', 'stop' or 'none').
+        Values past the end of the data are NaN.
+    """
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    breakout = np.asarray(breakout, dtype=np.int64)
+    horizons = sorted(int(h) for h in horizons)
+    max_h = horizons[-1]
+    n = len(close)
+
+    # (patterns × bars) forward paths via fancy indexing
+    idx = breakout[:, None] + np.arange(1, max_h + 1)[None, :]
+    in_range = idx < n
+    idx = np.minimum(idx, n - 1)
+
+    entry = close[breakout]
+    path_close = np.where(in_range, close[idx], np.nan)
+    path_high = np.where(in_range, high[idx], -np.inf)
+    path_low = np.where(in_range, low[idx], np.inf)
+
+    # Running excursions up to each bar
+    run_high = np.maximum.accumulate(path_high, axis=1)
+    run_low = np.minimum.accumulate(path_low, axis=1)
+
+    out = {"entry": entry}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for h in horizons:
+            reached = in_range[:, h - 1]
+            out[f"ret_{h}"] = path_close[:, h - 1] / entry - 1.0
+            out[f"mfe_{h}"] = np.where(reached, run_high[:, h - 1] / entry - 1.0, np.nan)
+            out[f"mae_{h}"] = np.where(reached, run_low[:, h - 1] / entry - 1.0, np.nan)
+
+        # First bar reaching target / stop (running extremes are monotonic)
+        target_hit = run_high >= (entry * (1.0 + target))[:, None]
+        stop_hit = run_low <= (entry * (1.0 - stop))[:, None]
+    target_bars = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1) + 1.0, np.nan)
+    stop_bars = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1) + 1.0, np.nan)
+
+    # Same-bar hits are counted as stops (conservative)
+    outcome = np.full(len(breakout), "none", dtype=object)
+    outcome[~np.isnan(target_bars)] = "target"
+    stopped = ~np.isnan(stop_bars) & ~(target_bars < stop_bars)
+    outcome[stopped] = "stop"
+
+    out["target_bars"] = target_bars
+    out["stop_bars"] = stop_bars
+    out["outcome"] = outcome
+    return out
+
+
+def backtest_patterns(df, patterns, symbol=None, horizons=DEFAULT_HORIZONS,
+                      target=0.02, stop=0.01):
+    """
+    Backtest find_patterns output for one symbol.
+
+    Args:
+        df: OHLC DataFrame the patterns were detected on (positional index).
+        patterns: list of pattern dicts, or the dict from pattern_arrays().
+
+    Returns:
+        DataFrame with one row per pattern.
+    """
+    arrays = patterns if isinstance(patterns, dict) else pattern_arrays(patterns)
+    if len(arrays["breakout"]) == 0:
+        return pd.DataFrame()
+
+    result = forward_outcomes(
+        df["close"].values, df["high"].values, df["low"].values,
+        arrays["breakout"], horizons=horizons, target=target, stop=stop,
+    )
+    frame = pd.DataFrame({**arrays, **result})
+    if symbol is not None:
+        frame.insert(0, "symbol", symbol)
+    return frame
+
+
+def backtest_report(report, prices, horizons=DEFAULT_HORIZONS, target=0.02, stop=0.01):
+    """
+    Backtest every row of a report (report.csv layout) against price data.
+
+    Args:
+        report: DataFrame with 'symbol', 'cup_start', 'handle_end', 'breakout',
+            'valid', 'invalid_reason' columns (bar indices per symbol).
+        prices: raw OHLCV DataFrame with a 'symbol' column, in the same
+            per-symbol bar order used for detection.
+    """
+    frames = []
+    for symbol, rows in report.groupby("symbol", sort=False):
+        df_symbol = prices[prices["symbol"] == symbol].reset_index(drop=True)
+        arrays = {
+            "cup_start": rows["cup_start"].to_numpy(dtype=np.int64),
+            "handle_end": rows["handle_end"].to_numpy(dtype=np.int64),
+            "breakout": rows["breakout"].to_numpy(dtype=np.int64),
+            "valid": rows["valid"].astype(bool).to_numpy(),
+            "invalid_reason": rows["invalid_reason"].fillna("").to_numpy(dtype=object),
+        }
+        frames.append(backtest_patterns(
+            df_symbol, arrays, symbol=symbol, horizons=horizons, target=target, stop=stop
+        ))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def summarize_backtest(results, by=("symbol", "invalid_reason")):
+    """
+    Aggregate backtest rows per group (default: per symbol and invalid_reason).
+
+    Returns:
+        DataFrame with pattern counts, mean returns/excursions per horizon,
+        target/stop hit rates and mean bars to target.
+    """
+    by = list(by)
+    metric_cols = [c for c in results.columns if c.startswith(("ret_", "mfe_", "mae_"))]
+    frame = results.assign(
+        target_hit=results["outcome"] == "target",
+        stop_hit=results["outcome"] == "stop",
+    )
+    grouped = frame.groupby(by, sort=True, dropna=False)
+
+    summary = grouped[metric_cols].mean()
+    summary.insert(0, "count", grouped.size())
+    summary["target_rate"] = grouped["target_hit"].mean()
+    summary["stop_rate"] = grouped["stop_hit"].mean()
+    summary["avg_target_bars"] = grouped["target_bars"].mean()
+    return summary.reset_index()
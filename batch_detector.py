@@ -0,0 +1,117 @@
+import numpy as np
+import talib
+from pattern_detector import (
+    compute_window_stats, evaluate_window_rules, clean_window_mask, window_pattern,
+    CUP_BARS, FLAG_BAD,
+)
+from features import window_features, FEATURE_COLUMNS
+
+# Upper bound on window × bar cells materialised per block of symbols
+MAX_BLOCK_CELLS = 16_000_000
+
+
+def stack_symbols(data, symbols=None) -> dict:
+    """
+    Stack symbols of an OHLCVData into (symbols × bars) arrays on a shared
+    time grid (the union of their timestamps).
+
+    Bars a symbol lacks are NaN and flagged FLAG_BAD, so windows over them are
+    skipped; 'position' maps grid columns back to each symbol's own bar index.
+    """
+    symbols = list(data.symbols if symbols is None else symbols)
+    per_symbol = [data.symbol_arrays(s) for s in symbols]
+    grids = [arrays["timestamp"] for arrays in per_symbol]
+
+    aligned = all(len(g) == len(grids[0]) and np.array_equal(g, grids[0]) for g in grids)
+    grid = grids[0] if aligned else np.unique(np.concatenate(grids))
+    shape = (len(symbols), len(grid))
+
+    stacked = {"symbols": symbols, "timestamp": grid}
+    for col in ("high", "low", "close", "volume"):
+        if all(col in arrays for arrays in per_symbol):
+            stacked[col] = np.full(shape, np.nan)
+    present = np.zeros(shape, dtype=bool)
+    flags = np.zeros(shape, dtype=np.uint8)
+
+    for row, arrays in enumerate(per_symbol):
+        cols = slice(None) if aligned else np.searchsorted(grid, arrays["timestamp"])
+        present[row, cols] = True
+        for col in ("high", "low", "close", "volume"):
+            if col in stacked:
+                stacked[col][row, cols] = arrays[col]
+        if "bar_flags" in arrays:
+            flags[row, cols] = arrays["bar_flags"]
+
+    flags[~present] |= FLAG_BAD
+    stacked["present"] = present
+    stacked["bar_flags"] = flags
+    stacked["position"] = np.cumsum(present, axis=1) - 1
+    return stacked
+
+
+def _batch_atr(stacked) -> np.ndarray:
+    """ATR(14) per symbol over its own bars (TA-Lib is 1-D, so one call per row)."""
+    atr = np.full(stacked["close"].shape, np.nan)
+    for row, present in enumerate(stacked["present"]):
+        atr[row, present] = talib.ATR(
+            stacked["high"][row, present], stacked["low"][row, present], stacked["close"][row, present],
+            timeperiod=14,
+        )
+    return atr
+
+
+def batch_find_patterns(data, symbols=None, max_images=30, start=0, thresholds=None,
+                        features: bool = False) -> dict:
+    """
+    Cup & Handle detection for many symbols at once.
+
+    Window statistics, R², rule masks and gap masks run as single NumPy
+    operations over (symbols × windows) blocks; only ATR is computed per row.
+    Results match CupHandleDetector.find_patterns on each symbol's prepared
+    frame (windows over missing or bad bars are skipped).
+
+    Args:
+        data: OHLCVData holding the symbols.
+        symbols: symbols to scan (default: all).
+        max_images, start: per symbol, as in find_patterns (start is a bar index).
+        thresholds: rule threshold overrides.
+        features: also attach features.FEATURE_COLUMNS to each pattern.
+
+    Returns:
+        {symbol: list of pattern dicts}
+    """
+    stacked = stack_symbols(data, symbols)
+    symbols = stacked["symbols"]
+    n_bars = len(stacked["timestamp"])
+    atr = _batch_atr(stacked)
+    volume = stacked.get("volume")
+    scan = clean_window_mask(stacked["bar_flags"])
+
+    # Blocks of symbols keep the (rows × windows × CUP_BARS) temporaries bounded
+    block = max(1, MAX_BLOCK_CELLS // max(n_bars * CUP_BARS, 1))
+    results = {}
+    for lo in range(0, len(symbols), block):
+        rows = slice(lo, lo + block)
+        stats = compute_window_stats(
+            stacked["high"][rows], stacked["low"][rows], stacked["close"][rows],
+            volume=None if volume is None else volume[rows], atr=atr[rows],
+        )
+        valid, reasons = evaluate_window_rules(stats, thresholds)
+        window_feats = window_features(stats) if features else None
+
+        for k, symbol in enumerate(symbols[rows]):
+            row = lo + k
+            position = stacked["position"][row]
+            windows = np.flatnonzero(scan[row] & (position[:scan.shape[1]] >= start))[:max_images]
+
+            row_stats = {key: value[k] for key, value in stats.items() if np.ndim(value) == 2}
+            patterns = []
+            for i in windows:
+                pat = window_pattern(row_stats, valid[k], reasons[k], i, cup_start=position[i])
+                if features:
+                    # Keys the pattern already has (cup_depth, durations) keep their values
+                    for col in FEATURE_COLUMNS:
+                        pat.setdefault(col, window_feats[col][k, i])
+                patterns.append(pat)
+            results[symbol] = patterns
+    return results
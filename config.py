@@ -6,16 +6,45 @@ import os
 DATA_FOLDER = "data"
 PREPROCESSED_FILE = os.path.join(DATA_FOLDER, "preprocessed_data.csv")
 
+# Data preparation: bar interval (None = infer) and whether missing bars are
+# inserted (previous close carried forward) or only flagged
+BAR_FREQ = None
+FILL_GAPS = False
+
 # Report CSV at root level
 REPORT_FILE = "report.csv"
 
+# SQLite pattern history (kept across runs)
+PATTERN_DB = "patterns.db"
+
+# Compact data layer: store prices as float32 when the round trip stays
+# within tolerance, and report per-stage memory against a budget (MB, None = off)
+FLOAT32_PRICES = False
+MEMORY_BUDGET_MB = None
+
+# Cached detector output / classifier scores per symbol
+CACHE_DIR = "cache"
+
+# Detect all symbols at once over a (symbols × bars) matrix instead of one
+# detector per symbol (best for many time-aligned symbols; cached symbols are skipped)
+BATCH_DETECTION = False
+
+# Pipelined execution: render in a worker pool, write in an I/O thread.
+# Rendering is CPU-bound Python (matplotlib), so processes scale better than threads.
+PIPELINED = False
+PIPELINE_EXECUTOR = "process"  # "process" or "thread"
+PIPELINE_RENDER_WORKERS = 4
+PIPELINE_QUEUE_SIZE = 32  # max patterns in flight between detection and writing
+
 # Folder to save cup & handle pattern images
 PATTERNS_DIR = "patterns"
+SAVE_MONTAGE = False  # opt-in: also save all patterns of a run as one montage PNG (+ JSON index)
 
 # Directory for logs
 LOG_DIR = os.path.join(os.getcwd(), "log_info")
-os.makedirs(LOG_DIR, exist_ok=True)
 
-# Ensure required folders exist
-os.makedirs(DATA_FOLDER, exist_ok=True)
-os.makedirs(PATTERNS_DIR, exist_ok=True)
+
+def ensure_dirs():
+    """Create the output folders; called by the stages that write, not on import."""
+    for folder in (LOG_DIR, DATA_FOLDER, PATTERNS_DIR):
+        os.makedirs(folder, exist_ok=True)
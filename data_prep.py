@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+from pattern_detector import FLAG_GAP, FLAG_FILLED, FLAG_BAD
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+
+def _carry_close_forward(frame: pd.DataFrame, codes: np.ndarray, rows: np.ndarray):
+    """Replace OHLC of `rows` with the previous (else next) close of the same symbol."""
+    close = frame["close"].where(~rows)
+    close = close.groupby(codes).ffill()
+    close = close.fillna(close.groupby(codes).bfill())
+    for col in PRICE_COLUMNS:
+        frame[col] = frame[col].where(~rows, close)
+
+
+def prepare_ohlcv(df: pd.DataFrame, freq=None, fill_gaps: bool = False):
+    """
+    One-time vectorized cleanup of raw OHLCV bars (one or many symbols).
+
+    - timestamps parsed and sorted per symbol; duplicate bars dropped (last kept)
+    - gaps: bars more than `freq` after the previous bar get FLAG_GAP, or with
+      fill_gaps=True the missing bars are inserted with the previous close
+      carried forward, zero volume and FLAG_FILLED
+    - bars with non-finite or inconsistent OHLC (high below open/close/low,
+      low above open/close) get FLAG_BAD; non-finite prices are replaced by the
+      previous close so indicators stay finite
+
+    Args:
+        df: frame with 'timestamp', OHLC, optional 'volume' and 'symbol' columns.
+        freq: bar interval (e.g. "1min"); inferred from the median step if None.
+        fill_gaps: insert missing bars instead of only flagging them.
+
+    Returns:
+        (prepared, summary): prepared has a uint8 'bar_flags' column and a
+        0..n-1 index; summary counts rows, duplicates, gaps, filled and bad bars.
+    """
+    frame = df.copy()
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"]).astype("datetime64[ns]")
+    keys = ["symbol", "timestamp"] if "symbol" in frame.columns else ["timestamp"]
+    n_raw = len(frame)
+
+    # ---------------------------
+    # Sort + dedupe
+    # ---------------------------
+    frame = frame.sort_values(keys, kind="stable")
+    frame = frame.drop_duplicates(keys, keep="last").reset_index(drop=True)
+    if "symbol" in frame.columns:
+        codes = pd.factorize(frame["symbol"])[0]
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+
+    # ---------------------------
+    # OHLC consistency
+    # ---------------------------
+    prices = frame[PRICE_COLUMNS].to_numpy(dtype=float)
+    volume = frame["volume"].to_numpy(dtype=float) if "volume" in frame.columns else np.zeros(len(frame))
+    non_finite = ~np.isfinite(prices).all(axis=1) | (prices <= 0).any(axis=1) | ~np.isfinite(volume)
+    o, h, l, c = prices.T
+    with np.errstate(invalid="ignore"):
+        inconsistent = (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (h < l)
+    bad = non_finite | inconsistent
+    if non_finite.any():
+        _carry_close_forward(frame, codes, non_finite)
+        if "volume" in frame.columns:
+            frame["volume"] = frame["volume"].where(np.isfinite(volume), 0)
+    flags = np.where(bad, FLAG_BAD, 0).astype(np.uint8)
+
+    # ---------------------------
+    # Gaps
+    # ---------------------------
+    ts = frame["timestamp"].to_numpy().view(np.int64)
+    first_bar = np.r_[True, codes[1:] != codes[:-1]] if len(ts) else np.zeros(0, dtype=bool)
+    step = np.diff(ts, prepend=ts[:1])
+    step[first_bar] = 0
+    if freq is None:
+        steps = step[~first_bar]
+        interval = int(np.median(steps)) if len(steps) else 0
+    else:
+        interval = pd.Timedelta(freq).value
+    gap = ~first_bar & (step > interval) if interval > 0 else np.zeros(len(ts), dtype=bool)
+
+    n_filled = 0
+    if fill_gaps and gap.any():
+        # One inserted bar per missing interval, placed before each gap bar
+        missing = np.where(gap, step // interval - 1, 0).astype(np.int64)
+        n_filled = int(missing.sum())
+        owner = np.repeat(np.arange(len(ts)), missing)
+        k = np.arange(n_filled) - np.repeat(np.cumsum(missing) - missing, missing) + 1
+
+        filled = frame.iloc[owner - 1].copy()
+        filled["timestamp"] = (ts[owner - 1] + k * interval).view("datetime64[ns]")
+        for col in PRICE_COLUMNS:
+            filled[col] = filled["close"]
+        if "volume" in filled.columns:
+            filled["volume"] = 0
+
+        order = np.argsort(np.r_[np.arange(len(ts)) * 1.0, owner - 0.5], kind="stable")
+        frame = pd.concat([frame, filled], ignore_index=True).iloc[order].reset_index(drop=True)
+        flags = np.r_[flags, np.full(n_filled, FLAG_FILLED, dtype=np.uint8)][order]
+    else:
+        flags[gap] |= FLAG_GAP
+
+    frame["bar_flags"] = flags
+    summary = {
+        "rows_in": n_raw,
+        "rows_out": len(frame),
+        "duplicates": n_raw - len(ts),
+        "gaps": int(gap.sum()),
+        "filled": n_filled,
+        "bad": int(bad.sum()),
+    }
+    return frame, summary
@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import talib
+from pattern_detector import (
+    compute_window_stats, evaluate_window_rules, DEFAULT_THRESHOLDS, CUP_BARS, HANDLE_BARS,
+)
+
+# Columns every pattern type reports (bar indices are positions in the series)
+RESULT_COLUMNS = ["pattern", "start", "end", "breakout", "valid", "invalid_reason"]
+
+# ---------------------------
+# Statistic registry: name → function(engine) computing it for the whole series
+# ---------------------------
+STATISTICS = {}
+
+
+def statistic(name: str):
+    """Register a window statistic; its function may request others via engine.stat()."""
+    def register(func):
+        STATISTICS[name] = func
+        return func
+    return register
+
+
+@statistic("atr")
+def _atr(engine):
+    return talib.ATR(engine.high, engine.low, engine.close, timeperiod=14)
+
+
+@statistic("cup_handle_windows")
+def _cup_handle_windows(engine):
+    return compute_window_stats(
+        engine.high, engine.low, engine.close, volume=engine.volume, atr=engine.stat("atr")
+    )
+
+
+# Double bottom geometry: two troughs in consecutive halves, breakout on the next bar
+DOUBLE_BOTTOM_BARS = 40
+DOUBLE_BOTTOM_THRESHOLDS = {
+    "max_trough_diff": 0.03,      # |left trough - right trough| / trough average
+    "min_depth_ratio": 2.0,       # neckline above troughs vs. average candle range
+    "min_breakout_atr": 1.0,      # breakout above neckline, in ATRs
+}
+
+
+@statistic("double_bottom_windows")
+def _double_bottom_windows(engine):
+    half = DOUBLE_BOTTOM_BARS // 2
+    n_windows = max(len(engine.close) - DOUBLE_BOTTOM_BARS, 0)
+    if n_windows == 0:
+        keys = ("left_trough", "right_trough", "neckline", "avg_candle", "breakout_price", "atr")
+        return {
+            "start": np.empty(0, dtype=np.int64),
+            "breakout": np.empty(0, dtype=np.int64),
+            **{key: np.empty(0) for key in keys},
+        }
+    high = sliding_window_view(engine.high, DOUBLE_BOTTOM_BARS)[:n_windows]
+    low = sliding_window_view(engine.low, DOUBLE_BOTTOM_BARS)[:n_windows]
+
+    left_at = low[:, :half].argmin(axis=1)
+    right_at = half + low[:, half:].argmin(axis=1)
+    rows = np.arange(n_windows)
+    left_trough = low[rows, left_at]
+    right_trough = low[rows, right_at]
+
+    # Neckline: highest high between the two troughs
+    bars = np.arange(DOUBLE_BOTTOM_BARS)
+    between = (bars >= left_at[:, None]) & (bars <= right_at[:, None])
+    neckline = np.where(between, high, -np.inf).max(axis=1, initial=-np.inf)
+
+    breakout = np.arange(n_windows) + DOUBLE_BOTTOM_BARS
+    return {
+        "start": np.arange(n_windows),
+        "left_trough": left_trough,
+        "right_trough": right_trough,
+        "neckline": neckline,
+        "avg_candle": (high - low).mean(axis=1),
+        "breakout": breakout,
+        "breakout_price": engine.close[breakout],
+        "atr": engine.stat("atr")[breakout],
+    }
+
+
+# ---------------------------
+# Pattern registry
+# ---------------------------
+class PatternDefinition:
+    """
+    A pattern type: the statistics it needs and its rules over them.
+
+    evaluate() receives {statistic name: value} for `requires` and the merged
+    thresholds, and returns arrays for the RESULT_COLUMNS (except 'pattern'),
+    one entry per candidate window.
+    """
+    name = None
+    requires = ()
+    thresholds = {}
+
+    def evaluate(self, stats: dict, thresholds: dict) -> dict:
+        raise NotImplementedError
+
+
+PATTERNS = {}
+
+
+def register_pattern(definition: PatternDefinition) -> PatternDefinition:
+    missing = [s for s in definition.requires if s not in STATISTICS]
+    if missing:
+        raise ValueError(f"Pattern '{definition.name}' requires unknown statistics: {missing}")
+    PATTERNS[definition.name] = definition
+    return definition
+
+
+class CupHandlePattern(PatternDefinition):
+    """CupHandleDetector's rules, evaluated for every window at once."""
+    name = "cup_handle"
+    requires = ("cup_handle_windows",)
+    thresholds = DEFAULT_THRESHOLDS
+
+    def evaluate(self, stats, thresholds):
+        windows = stats["cup_handle_windows"]
+        valid, reason = evaluate_window_rules(windows, thresholds)
+        start = windows["cup_start"]
+        return {
+            "start": start,
+            "end": start + CUP_BARS + HANDLE_BARS - 1,
+            "breakout": start + CUP_BARS + HANDLE_BARS,
+            "valid": valid,
+            "invalid_reason": reason,
+        }
+
+
+class DoubleBottomPattern(PatternDefinition):
+    """Two similar troughs, then a close above the neckline between them."""
+    name = "double_bottom"
+    requires = ("double_bottom_windows",)
+    thresholds = DOUBLE_BOTTOM_THRESHOLDS
+
+    def evaluate(self, stats, thresholds):
+        w = stats["double_bottom_windows"]
+        left, right, neckline, price = w["left_trough"], w["right_trough"], w["neckline"], w["breakout_price"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            trough_diff = np.abs(left - right) / ((left + right) / 2.0)
+            height = neckline - np.maximum(left, right)
+            checks = [
+                ("Troughs differ too much", trough_diff > thresholds["max_trough_diff"]),
+                ("Neckline too shallow", height < thresholds["min_depth_ratio"] * w["avg_candle"]),
+                ("No breakout above neckline", price <= neckline),
+                ("Breakout not strong enough (ATR filter)",
+                 np.isnan(w["atr"]) | (price < neckline + thresholds["min_breakout_atr"] * w["atr"])),
+            ]
+        reasons, failed = zip(*checks)
+        reason = np.select(failed, np.array(reasons, dtype=object), default="")
+        return {
+            "start": w["start"],
+            "end": w["breakout"] - 1,
+            "breakout": w["breakout"],
+            "valid": reason == "",
+            "invalid_reason": reason,
+        }
+
+
+register_pattern(CupHandlePattern())
+register_pattern(DoubleBottomPattern())
+
+
+# ---------------------------
+# Engine
+# ---------------------------
+class DetectionEngine:
+    """
+    Evaluate all registered patterns over one price series in a single pass.
+
+    Each statistic is computed at most once per engine and shared by every
+    pattern that requires it, so adding a pattern type only adds its own
+    statistics and rule cost.
+    """
+
+    def __init__(self, df: pd.DataFrame, symbol: str = None):
+        self.symbol = symbol
+        self.high = np.asarray(df["high"].values, dtype=float)
+        self.low = np.asarray(df["low"].values, dtype=float)
+        self.close = np.asarray(df["close"].values, dtype=float)
+        self.volume = np.asarray(df["volume"].values, dtype=float) if "volume" in df.columns else None
+        self.timestamps = df["timestamp"].values if "timestamp" in df.columns else None
+        self._stats = {}
+
+    @classmethod
+    def from_detector(cls, detector, symbol: str = None):
+        """Engine over a CupHandleDetector's frame, reusing its cached ATR."""
+        engine = cls(detector.df, symbol=symbol)
+        engine._stats["atr"] = detector.atr()
+        return engine
+
+    def stat(self, name: str):
+        """Value of a registered statistic, computed on first use."""
+        if name not in self._stats:
+            if name not in STATISTICS:
+                raise KeyError(f"Unknown statistic: {name}")
+            self._stats[name] = STATISTICS[name](self)
+        return self._stats[name]
+
+    def run(self, patterns=None, thresholds: dict = None, valid_only: bool = False) -> pd.DataFrame:
+        """
+        Detect registered patterns.
+
+        Args:
+            patterns: names to evaluate (default: all registered).
+            thresholds: {pattern name: {threshold: value}} overrides.
+            valid_only: keep only windows that pass every rule.
+
+        Returns:
+            DataFrame with RESULT_COLUMNS (plus 'symbol', 'start_time' and
+            'breakout_time' when known), sorted by start then pattern.
+        """
+        names = list(PATTERNS) if patterns is None else list(patterns)
+        unknown = [n for n in names if n not in PATTERNS]
+        if unknown:
+            raise ValueError(f"Unknown patterns: {unknown}")
+
+        frames = []
+        for name in names:
+            definition = PATTERNS[name]
+            stats = {s: self.stat(s) for s in definition.requires}
+            limits = {**definition.thresholds, **(thresholds or {}).get(name, {})}
+            result = pd.DataFrame(definition.evaluate(stats, limits))
+            result.insert(0, "pattern", name)
+            frames.append(result[RESULT_COLUMNS])
+
+        results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=RESULT_COLUMNS)
+        if valid_only:
+            results = results[results["valid"]]
+        results = results.sort_values(["start", "pattern"], kind="stable").reset_index(drop=True)
+
+        if self.timestamps is not None:
+            results["start_time"] = self.timestamps[results["start"].to_numpy(dtype=np.int64)]
+            results["breakout_time"] = self.timestamps[results["breakout"].to_numpy(dtype=np.int64)]
+        if self.symbol is not None:
+            results.insert(0, "symbol", self.symbol)
+        return results
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+from pattern_detector import compute_window_stats, CUP_BARS, HANDLE_BARS
+
+# Bump whenever FEATURE_COLUMNS or their definitions change; saved models
+# record the version and column list they were trained on.
+FEATURE_VERSION = 2
+
+# Version 1: the original five report columns (missing values filled with 0)
+LEGACY_FEATURES = ["cup_depth", "cup_duration", "handle_depth", "handle_duration", "r2"]
+
+# Version 2: computed for every window, whether or not it passed the rules (NaN = unavailable)
+FEATURE_COLUMNS = [
+    "cup_depth",
+    "cup_duration",
+    "handle_duration",
+    "depth_ratio",       # cup depth / average candle range
+    "rim_asymmetry",     # |left rim - right rim| / rim average
+    "handle_rim_gap",    # (rim high - handle high) / cup depth
+    "retrace_ratio",     # (rim high - handle low) / cup depth
+    "handle_floor",      # (handle low - cup low) / cup depth
+    "cup_r2",            # R² of the parabola fit of cup closes
+    "breakout_atr",      # breakout above handle high, in ATRs
+    "breakout_return",   # breakout above handle high, relative to handle high
+    "atr_pct",           # ATR / breakout price
+    "volume_ratio",      # breakout volume / average handle volume
+]
+
+
+def window_features(stats: dict) -> dict:
+    """FEATURE_COLUMNS arrays from compute_window_stats output (one value per window)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cup_depth = stats["cup_depth"]
+        return {
+            "cup_depth": cup_depth,
+            "cup_duration": np.full(cup_depth.shape, float(CUP_BARS)),
+            "handle_duration": np.full(cup_depth.shape, float(HANDLE_BARS)),
+            "depth_ratio": stats["depth_ratio"],
+            "rim_asymmetry": stats["rim_asymmetry"],
+            "handle_rim_gap": (stats["rim_high"] - stats["handle_high"]) / cup_depth,
+            "retrace_ratio": stats["retrace_ratio"],
+            "handle_floor": (stats["handle_low"] - stats["cup_low"]) / cup_depth,
+            "cup_r2": stats["r2"],
+            "breakout_atr": stats["breakout_atr"],
+            "breakout_return": stats["breakout_excess"] / stats["handle_high"],
+            "atr_pct": stats["atr"] / stats["breakout_price"],
+            "volume_ratio": stats["volume_ratio"],
+        }
+
+
+def compute_features(high, low, close, volume=None, atr=None) -> dict:
+    """Feature arrays for every window find_patterns scans, straight from OHLCV arrays."""
+    return window_features(compute_window_stats(high, low, close, volume=volume, atr=atr))
+
+
+def detector_features(detector, start: int = 0) -> dict:
+    """
+    Feature arrays for a CupHandleDetector's windows from cup_start `start` on
+    (reuses its cached window stats); entry k is window start + k.
+    """
+    return window_features(detector.window_stats(start))
+
+
+def attach_features(patterns: list, features: dict, start: int = 0) -> list:
+    """
+    Copy each pattern's window features into its dict (in place), keyed on
+    cup_start; `start` is the first window of `features` (see detector_features).
+    Keys the detector already set (cup_depth, cup_duration, handle_duration)
+    keep the detector's values and types.
+    """
+    for pat in patterns:
+        i = pat["cup_start"] - start
+        for col in FEATURE_COLUMNS:
+            pat.setdefault(col, features[col][i])
+    return patterns
+
+
+def feature_set(columns):
+    """
+    (names, version) of the newest feature set available in `columns`
+    (e.g. a report's columns); raises ValueError if none is complete.
+    """
+    columns = set(columns)
+    if set(FEATURE_COLUMNS) <= columns:
+        return list(FEATURE_COLUMNS), FEATURE_VERSION
+    if set(LEGACY_FEATURES) <= columns:
+        return list(LEGACY_FEATURES), 1
+    raise ValueError(f"Report has neither feature set; missing {sorted(set(LEGACY_FEATURES) - columns)}")
+
+
+def model_features(model):
+    """(names, version) a fitted model expects; models without the attributes are version 1."""
+    return (
+        list(getattr(model, "feature_names_", LEGACY_FEATURES)),
+        getattr(model, "feature_version_", 1),
+    )
+
+
+def feature_matrix(rows, names, version: int = FEATURE_VERSION) -> np.ndarray:
+    """
+    Float matrix of `names` from a DataFrame or list of pattern dicts.
+    Missing values stay NaN, except for version 1 where they become 0 as before.
+    """
+    frame = pd.DataFrame(rows) if not isinstance(rows, pd.DataFrame) else rows
+    X = frame.reindex(columns=names).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float, copy=True)
+    X[np.isinf(X)] = np.nan  # e.g. ratios over a zero-depth cup
+    if version < 2:
+        X[np.isnan(X)] = 0.0
+    return X
@@ -1,29 +1,125 @@
 import os
-import pandas as pd
-import joblib  # still used for saving/loading models
-from pattern_detector import CupHandleDetector
-from plot_utils import save_pattern_plot, save_pattern_html
-from utils.pattern_classifier import PatternClassifier  # ✅ fixed import
+import sys
+import argparse
 import config
 
+# Heavy dependencies (pandas, scikit-learn, TA-Lib, matplotlib/plotly) are
+# imported inside the stages that use them, so `--scan-only` and `--help`
+# start without loading them.
+
+# Entry modes measured by --profile-imports (main.py arguments)
+PROFILE_MODES = {
+    "scan-only": ["--scan-only"],
+    "full": [],
+}
+HEAVY_MODULES = ["pandas", "talib", "sklearn", "joblib", "matplotlib", "plotly"]
+
+
+def render_assets(symbol, task):
+    """
+    Step 4a: Save visual assets (PNG + HTML) for one pattern.
+    Returns (png_path, html_path), or (None, None) if rendering failed.
+    """
+    from plot_utils import save_pattern_plot, save_pattern_html
+
+    pattern_id, pat, _, _ = task
+    try:
+        png_path = save_pattern_plot(pat, symbol, pattern_id=pattern_id)
+        html_path = save_pattern_html(pat, symbol, pattern_id=pattern_id)
+    except Exception as e:
+        print(f"Failed to save assets for pattern {pattern_id}: {e}")
+        png_path, html_path = None, None
+    return png_path, html_path
+
+
+def build_report_row(symbol, task, assets):
+    """Step 4b: Report metadata for one pattern."""
+    from features import FEATURE_COLUMNS
+
+    _, pat, (ml_valid, confidence), (cup_start_time, breakout_time) = task
+    png_path, html_path = assets
+    row = {
+        "symbol": symbol,
+        "cup_start_time": cup_start_time,
+        "breakout_time": breakout_time,
+        "cup_start": pat["cup_start"],
+        "cup_end": pat["cup_end"],
+        "handle_start": pat["handle_start"],
+        "handle_end": pat["handle_end"],
+        "cup_depth": pat["cup_depth"],
+        "cup_duration": pat["cup_duration"],
+        "handle_depth": pat["handle_depth"],
+        "handle_duration": pat["handle_duration"],
+        "breakout": pat["breakout"],
+        "valid": pat["valid"],                   # rule-based valid
+        "invalid_reason": pat["invalid_reason"], # rule-based reason
+        "r2": pat["r2"],
+        "ml_valid": ml_valid,                    # ML classification
+        "confidence": confidence,                # ML confidence
+        "png_file": png_path,
+        "html_file": html_path
+    }
+    # Window features (training input for the classifier)
+    for col in FEATURE_COLUMNS:
+        row.setdefault(col, pat.get(col))
+    return row
+
+
+def main(pipelined=None, import_only=False):
+    """
+    Run the full scan. With pipelined=True (default: config.PIPELINED),
+    rendering runs in a worker pool and report/store writes in an I/O
+    thread while detection continues; output is identical either way.
+
+    With import_only=True, only the modules this run's stages need are
+    imported (nothing is read or written); used by --profile-imports.
+    """
+    if pipelined is None:
+        pipelined = config.PIPELINED
+    model_path = os.path.join("models", "cup_handle_model.pkl")
+
+    # Stage modules, imported once the run's configuration is known
+    import pandas as pd
+    import talib  # noqa: F401  (detection: CupHandleDetector.atr / batch ATR)
+    from ohlcv_data import OHLCVData, MemoryBudget
+    from data_prep import prepare_ohlcv
+    from pattern_store import PatternStore
+    from result_cache import ResultCache
+    if os.path.exists(model_path):
+        from utils.pattern_classifier import PatternClassifier
+    if config.BATCH_DETECTION:
+        from batch_detector import batch_find_patterns
+    if pipelined:
+        from pipeline import run_pipeline
+    if not pipelined or config.PIPELINE_EXECUTOR == "thread" or config.SAVE_MONTAGE:
+        import plot_utils  # rendering / montage in this process
+    if import_only:
+        return None
 
-def main():
     # -------------------------------
     # Step 1: Clear old report + assets
     # -------------------------------
+    config.ensure_dirs()
     open(config.REPORT_FILE, "w").close()
     print("Cleared content of report.csv")
 
     for f in os.listdir(config.PATTERNS_DIR):
-        if f.endswith(".png") or f.endswith(".html"):
+        if f.endswith((".png", ".html", ".json")):  # .json: montage index
             os.remove(os.path.join(config.PATTERNS_DIR, f))
-    print("Cleared old PNG/HTMLs in patterns")
+    print("Cleared old PNG/HTML/JSONs in patterns")
 
     # -------------------------------
     # Step 2: Preprocess raw data
     # -------------------------------
-    df = pd.read_csv("data/raw_data.csv", parse_dates=["timestamp"])
-    df.to_csv(config.PREPROCESSED_FILE, index=False)
+    memory = MemoryBudget(config.MEMORY_BUDGET_MB)
+    raw = pd.read_csv("data/raw_data.csv", dtype={"symbol": "category"})
+    prepared, prep_summary = prepare_ohlcv(raw, freq=config.BAR_FREQ, fill_gaps=config.FILL_GAPS)
+    print(f"Prepared data: {prep_summary}")
+    data = OHLCVData.from_frame(prepared, float32_prices=config.FLOAT32_PRICES)
+    del raw, prepared
+    memory.record("load", data)
+
+    data.to_frame().to_csv(config.PREPROCESSED_FILE, index=False)
     print(f"Preprocessed data saved to {config.PREPROCESSED_FILE}")
 
     symbols = ["BTCUSDT", "ETHUSDT"]
@@ -32,7 +128,6 @@ def main():
     # -------------------------------
     # Step 3: Load ML model if exists
     # -------------------------------
-    model_path = os.path.join("models", "cup_handle_model.pkl")
     classifier = None
     if os.path.exists(model_path):
         classifier = PatternClassifier(model_path)
@@ -42,64 +137,80 @@ def main():
         print("⚠️ No ML model found, skipping ML classification.")
 
     # -------------------------------
-    # Step 4: Detect patterns
+    # Step 4: Detect patterns → render assets → write report/store
     # -------------------------------
-    pattern_counter = 0
     report_rows = []
+    symbol_rows = {}
+    montage_items = []
+    cache = ResultCache(config.CACHE_DIR)
+
+    def detections():
+        """Detect (or load cached) patterns per symbol and yield their render tasks."""
+        pattern_counter = 0
+        if config.BATCH_DETECTION:
+            # Symbols missing from the result cache are detected in one pass over
+            # (symbols × bars) arrays; hits and appended bars reuse cached entries
+            results = cache.scan_many(
+                {symbol: data.symbol_frame(symbol) for symbol in symbols},
+                max_images=max_images, classifier=classifier,
+                detect_many=lambda missed: batch_find_patterns(data, missed, max_images=max_images, features=True),
+            )
+            missed = sum(1 for _, _, status in results.values() if status == "miss")
+            print(f"Batch detection over {missed} of {len(symbols)} symbols.")
+
+        for symbol in symbols:
+            df_symbol = data.symbol_frame(symbol)  # views into `data`, no copy
 
-    for symbol in symbols:
-        df_symbol = df[df["symbol"] == symbol].reset_index(drop=True)
-        detector = CupHandleDetector(df_symbol)
-        patterns = detector.find_patterns(max_images=max_images)
-
-        valid_count = sum(1 for p in patterns if p["valid"])
-        print(f"Detected {valid_count} valid cup & handle patterns for {symbol}.")
-
-        for pat in patterns:
-            df_slice = df_symbol.loc[pat["cup_start"]:pat["handle_end"]]
-            pat["df"] = df_slice
-
-            # -------------------------------
-            # Step 4a: Save visual assets (PNG + HTML)
-            # -------------------------------
-            try:
-                png_path = save_pattern_plot(pat, symbol, pattern_id=pattern_counter)
-                html_path = save_pattern_html(pat, symbol, pattern_id=pattern_counter)
-            except Exception as e:
-                print(f"Failed to save assets for pattern {pattern_counter}: {e}")
-                png_path, html_path = None, None
-
-            # -------------------------------
-            # Step 4b: ML classification
-            # -------------------------------
-            if classifier:
-                ml_valid, confidence = classifier.predict(pat)
+            if config.BATCH_DETECTION:
+                patterns, predictions, cache_status = results[symbol]
             else:
-                ml_valid, confidence = None, None
-
-            # -------------------------------
-            # Step 4c: Save metadata to report
-            # -------------------------------
-            report_rows.append({
-                "symbol": symbol,
-                "cup_start": pat["cup_start"],
-                "cup_end": pat["cup_end"],
-                "handle_start": pat["handle_start"],
-                "handle_end": pat["handle_end"],
-                "cup_depth": pat["cup_depth"],
-                "cup_duration": pat["cup_duration"],
-                "handle_depth": pat["handle_depth"],
-                "handle_duration": pat["handle_duration"],
-                "breakout": pat["breakout"],
-                "valid": pat["valid"],                   # rule-based valid
-                "invalid_reason": pat["invalid_reason"], # rule-based reason
-                "r2": pat["r2"],
-                "ml_valid": ml_valid,                    # ML classification
-                "confidence": confidence,                # ML confidence
-                "png_file": png_path,
-                "html_file": html_path
-            })
-            pattern_counter += 1
+                # Detection + ML scores, reused from cache when data/params/code are unchanged
+                patterns, predictions, cache_status = cache.scan(
+                    symbol, df_symbol, max_images=max_images, classifier=classifier
+                )
+            print(f"Result cache {cache_status} for {symbol}.")
+
+            valid_count = sum(1 for p in patterns if p["valid"])
+            print(f"Detected {valid_count} valid cup & handle patterns for {symbol}.")
+
+            timestamps = df_symbol["timestamp"]
+            tasks = []
+            for pat, prediction in zip(patterns, predictions):
+                pat["df"] = df_symbol.loc[pat["cup_start"]:pat["handle_end"]]
+                times = (timestamps.iloc[pat["cup_start"]], timestamps.iloc[pat["breakout"]])
+                tasks.append((pattern_counter, pat, prediction, times))
+                pattern_counter += 1
+            yield symbol, tasks
+
+    def write_row(symbol, task, assets):
+        symbol_rows.setdefault(symbol, []).append(build_report_row(symbol, task, assets))
+        pattern_id, pat, _, _ = task
+        montage_items.append((pattern_id, symbol, pat))
+
+    def flush_symbol(symbol):
+        # -------------------------------
+        # Step 4c: Persist to pattern store (one transaction per symbol)
+        # -------------------------------
+        rows = symbol_rows.pop(symbol, [])
+        added = store.upsert(rows)
+        print(f"Stored {len(rows)} patterns for {symbol} in {config.PATTERN_DB} ({added} new)")
+        report_rows.extend(rows)
+        memory.record(f"scan {symbol}", data, pd.DataFrame(report_rows))
+
+    # The store is closed (uncommitted writes rolled back) even if a stage fails
+    with PatternStore(config.PATTERN_DB) as store:
+        if pipelined:
+            run_pipeline(
+                detections(), render_assets, write_row, flush_symbol,
+                render_workers=config.PIPELINE_RENDER_WORKERS,
+                queue_size=config.PIPELINE_QUEUE_SIZE,
+                executor=config.PIPELINE_EXECUTOR,
+            )
+        else:
+            for symbol, tasks in detections():
+                for task in tasks:
+                    write_row(symbol, task, render_assets(symbol, task))
+                flush_symbol(symbol)
 
     # -------------------------------
     # Step 5: Save final report
@@ -110,8 +221,73 @@ def main():
     else:
         print("No patterns detected, report not generated.")
 
+    # -------------------------------
+    # Step 6: Review montage (all patterns in one PNG)
+    # -------------------------------
+    if config.SAVE_MONTAGE and montage_items:
+        montage_path = os.path.join(config.PATTERNS_DIR, "montage.png")
+        plot_utils.save_pattern_montage(montage_items, montage_path)
+        print(f"Montage of {len(montage_items)} patterns saved to {montage_path}")
 
-if __name__ == "__main__":
-    main()
 
+def profile_imports(modes=None) -> dict:
+    """
+    Start-up cost of each entry mode: main.py runs once per mode with
+    `-X importtime --import-only` in a fresh interpreter. Each mode imports
+    what its stages would (main(import_only=True), scan.py) and exits
+    without reading or writing any data.
+
+    Returns:
+        {mode: {"seconds": total import time, "heavy": [heavy modules loaded]}}
+    """
+    import subprocess
 
+    script = os.path.abspath(__file__)
+    results = {}
+    for mode in modes or list(PROFILE_MODES):
+        out = subprocess.run(
+            [sys.executable, "-X", "importtime", script, *PROFILE_MODES[mode], "--import-only"],
+            capture_output=True, text=True, check=True,
+        )
+
+        # "import time: self [us] | cumulative | package"; top-level imports have one leading space
+        micros, loaded = 0, set()
+        for line in out.stderr.splitlines():
+            parts = line.split("|")
+            if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+                continue
+            name = parts[2].rstrip()
+            loaded.add(name.strip().split(".")[0])
+            if len(name) - len(name.lstrip()) == 1:
+                micros += int(parts[1])
+
+        results[mode] = {"seconds": micros / 1e6, "heavy": [m for m in HEAVY_MODULES if m in loaded]}
+        heavy = ", ".join(results[mode]["heavy"]) or "none"
+        print(f"⏱️ {mode}: {results[mode]['seconds']:.3f}s of imports (heavy modules: {heavy})")
+    return results
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Cup & Handle scan: detect, classify, render, report")
+    parser.add_argument("--scan-only", action="store_true",
+                        help="Detection only (NumPy + detector core); remaining args go to scan.py")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="Measure the start-up import cost of each mode and exit")
+    parser.add_argument("--import-only", action="store_true",
+                        help="Import the selected mode's stage modules and exit (used by --profile-imports)")
+    parser.add_argument("--pipelined", action="store_true", default=None,
+                        help="Render in a worker pool while detection continues (default: config.PIPELINED)")
+    args, rest = parser.parse_known_args(argv)
+
+    if args.profile_imports:
+        return profile_imports()
+    if args.scan_only:
+        import scan
+        return None if args.import_only else scan.main(rest)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    return main(pipelined=args.pipelined, import_only=args.import_only)
+
+
+if __name__ == "__main__":
+    cli()
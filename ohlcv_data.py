@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+PRICE_TOLERANCE = 1e-6  # max relative error accepted when storing prices as float32
+
+
+def _nbytes(obj) -> int:
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, OHLCVData):
+        return obj.nbytes
+    return 0
+
+
+def _fits_float32(values: np.ndarray, tolerance: float) -> bool:
+    """True if every price survives a float32 round trip within `tolerance` (relative)."""
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return True
+    rounded = values.astype(np.float32).astype(np.float64)
+    scale = np.maximum(np.abs(values), np.finfo(np.float64).tiny)
+    return bool(np.max(np.abs(rounded - values) / scale) <= tolerance)
+
+
+class OHLCVData:
+    """
+    Compact, symbol-contiguous OHLCV arrays.
+
+    - 'symbol' is stored once per symbol (dictionary codes), not per row.
+    - timestamps are int64 epoch nanoseconds.
+    - prices are float64, or float32 when requested and within tolerance.
+    - volume is downcast to the smallest numeric dtype that holds it.
+    - bar flags from data_prep.prepare_ohlcv, if present, are kept as uint8.
+
+    Rows are ordered by symbol (stable, so bar order is kept) and each
+    symbol's bars form one contiguous slice; symbol_frame() returns views
+    into these arrays without copying.
+    """
+
+    def __init__(self, columns: dict, symbols: list, offsets: np.ndarray):
+        self.columns = columns
+        self.symbols = list(symbols)
+        self.offsets = offsets  # symbol i occupies rows offsets[i]:offsets[i + 1]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, float32_prices: bool = False,
+                   price_tolerance: float = PRICE_TOLERANCE):
+        """Build compact arrays from a raw OHLCV frame with a 'symbol' column."""
+        codes, symbols = pd.factorize(df["symbol"], sort=False)
+        order = np.argsort(codes, kind="stable")
+        offsets = np.searchsorted(codes[order], np.arange(len(symbols) + 1))
+
+        columns = {}
+        timestamps = pd.to_datetime(df["timestamp"]).to_numpy(dtype="datetime64[ns]")
+        columns["timestamp"] = np.ascontiguousarray(timestamps.view(np.int64)[order])
+
+        for col in PRICE_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy(dtype=np.float64)[order]
+            if float32_prices and _fits_float32(values, price_tolerance):
+                values = values.astype(np.float32)
+            columns[col] = np.ascontiguousarray(values)
+
+        if "volume" in df.columns:
+            volume = pd.to_numeric(df["volume"])
+            kind = "integer" if pd.api.types.is_integer_dtype(volume) else "float"
+            columns["volume"] = np.ascontiguousarray(
+                pd.to_numeric(volume, downcast=kind).to_numpy()[order]
+            )
+
+        if "bar_flags" in df.columns:
+            columns["bar_flags"] = np.ascontiguousarray(df["bar_flags"].to_numpy(dtype=np.uint8)[order])
+
+        return cls(columns, [str(s) for s in symbols], offsets)
+
+    @classmethod
+    def read_csv(cls, path: str, float32_prices: bool = False,
+                 price_tolerance: float = PRICE_TOLERANCE):
+        """Load a raw_data.csv-style file straight into the compact layout."""
+        df = pd.read_csv(path, dtype={"symbol": "category"})
+        return cls.from_frame(df, float32_prices=float32_prices, price_tolerance=price_tolerance)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self.columns.values()) + self.offsets.nbytes
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def symbol_arrays(self, symbol: str) -> dict:
+        """Views of one symbol's column arrays (no copies)."""
+        if symbol not in self.symbols:
+            raise KeyError(f"Unknown symbol: {symbol}")
+        i = self.symbols.index(symbol)
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return {col: arr[lo:hi] for col, arr in self.columns.items()}
+
+    def symbol_frame(self, symbol: str) -> pd.DataFrame:
+        """
+        One symbol's bars as a DataFrame (RangeIndex) backed by views of the
+        compact arrays; timestamps appear as datetime64[ns].
+        """
+        arrays = self.symbol_arrays(symbol)
+        arrays["timestamp"] = arrays["timestamp"].view("datetime64[ns]")
+        return pd.DataFrame(arrays, copy=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Full table with a categorical 'symbol' column (for exports)."""
+        frame = pd.DataFrame(self.columns, copy=False)
+        frame["timestamp"] = frame["timestamp"].to_numpy().view("datetime64[ns]")
+        counts = np.diff(self.offsets)
+        codes = np.repeat(np.arange(len(self.symbols)), counts)
+        frame["symbol"] = pd.Categorical.from_codes(codes, categories=self.symbols)
+        return frame
+
+
+class MemoryBudget:
+    """
+    Per-stage memory footprint, checked against an optional budget (in MB).
+
+    record() measures the objects passed for a stage; with a budget set it
+    also prints the footprint and warns when the stage exceeds the budget.
+    summary() returns all recorded stages.
+    """
+
+    def __init__(self, budget_mb: float = None):
+        self.budget_mb = budget_mb
+        self.stages = []
+
+    def record(self, stage: str, *objects) -> float:
+        size_mb = sum(_nbytes(obj) for obj in objects) / 1e6
+        self.stages.append((stage, size_mb))
+        if self.budget_mb is None:
+            return size_mb
+
+        print(f"📦 Memory [{stage}]: {size_mb:.2f} MB / budget {self.budget_mb:.1f} MB")
+        if size_mb > self.budget_mb:
+            print(f"⚠️ Stage '{stage}' exceeds memory budget ({size_mb:.2f} > {self.budget_mb:.1f} MB)")
+        return size_mb
+
+    def summary(self) -> pd.DataFrame:
+        return pd.DataFrame(self.stages, columns=["stage", "size_mb"])
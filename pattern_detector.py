@@ -1,16 +1,295 @@
-import pandas as pd
+from typing import TYPE_CHECKING
 import numpy as np
-from sklearn.metrics import r2_score
-import talib  
+from numpy.lib.stride_tricks import sliding_window_view
+
+# pandas and TA-Lib are imported where first needed, so the vectorized
+# window core loads with NumPy alone (see scan.py)
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Window geometry scanned by find_patterns (bar counts, inclusive)
+CUP_BARS = 31
+HANDLE_BARS = 11
+MIN_BARS = 50  # minimal bars from cup_start for a window to be scanned
+
+# Bar flags recorded by data_prep.prepare_ohlcv (bitmask in a 'bar_flags' column)
+FLAG_GAP = 1      # bars are missing right before this bar
+FLAG_FILLED = 2   # bar inserted by gap filling (previous close carried forward)
+FLAG_BAD = 4      # non-finite or inconsistent OHLC values
+
+# Rule thresholds used by _validate_cup_handle
+DEFAULT_THRESHOLDS = {
+    "min_depth_ratio": 2.0,       # cup depth vs. average candle range
+    "max_rim_asymmetry": 0.10,    # |left rim - right rim| / rim average
+    "max_handle_retrace": 0.4,    # handle depth vs. cup depth
+    "min_r2": 0.85,               # parabola fit of cup closes
+    "min_breakout_atr": 1.5,      # breakout above handle high, in ATRs
+    "min_volume_ratio": 1.5,      # breakout volume vs. average handle volume
+}
+
+
+def wilder_atr(high, low, close, period: int = 14) -> np.ndarray:
+    """
+    ATR with Wilder smoothing without TA-Lib: same algorithm as talib.ATR
+    (equal up to floating-point rounding), NaN for the first `period` bars.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    atr = np.full(close.shape, np.nan)
+    if len(close) <= period:
+        return atr
+
+    prev_close = close[:-1]
+    true_range = np.maximum.reduce([
+        high[1:] - low[1:], np.abs(high[1:] - prev_close), np.abs(low[1:] - prev_close)
+    ])
+    # Seed with the mean of the first `period` true ranges, then recurse
+    value = float(true_range[:period].sum()) / period
+    out = [value]
+    for tr in true_range[period:].tolist():
+        value = (value * (period - 1) + tr) / period
+        out.append(value)
+    atr[period:] = out
+    return atr
+
+
+def compute_window_stats(high, low, close, volume=None, atr=None):
+    """
+    Compute the raw statistics behind _validate_cup_handle for every
+    window find_patterns scans, in one vectorized pass.
+
+    Inputs are arrays whose last axis is time. Returns a dict of arrays
+    with one entry per window (cup_start = 0 .. len - MIN_BARS - 1).
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n_windows = max(high.shape[-1] - MIN_BARS, 0)
+
+    right_rim_offset = CUP_BARS - 1
+    handle_offset = CUP_BARS
+    breakout_offset = CUP_BARS + HANDLE_BARS
+
+    def windows(arr, length, offset):
+        if n_windows == 0:
+            return np.empty(arr.shape[:-1] + (0, length))
+        view = sliding_window_view(arr, length, axis=-1)
+        return view[..., offset:offset + n_windows, :]
+
+    def shifted(arr, offset):
+        return arr[..., offset:offset + n_windows]
+
+    cup_high = windows(high, CUP_BARS, 0)
+    cup_low = windows(low, CUP_BARS, 0)
+    cup_close = windows(close, CUP_BARS, 0)
+    handle_high = windows(high, HANDLE_BARS, handle_offset).max(axis=-1, initial=-np.inf)
+    handle_low = windows(low, HANDLE_BARS, handle_offset).min(axis=-1, initial=np.inf)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Cup depth vs. average candle
+        avg_candle = (cup_high - cup_low).mean(axis=-1)
+        cup_low_min = cup_low.min(axis=-1, initial=np.inf)
+        cup_depth = cup_high.max(axis=-1, initial=-np.inf) - cup_low_min
+
+        # Rims & handle
+        left_rim = shifted(high, 0)
+        right_rim = shifted(high, right_rim_offset)
+        rim_high = np.maximum(left_rim, right_rim)
+        rim_asymmetry = np.abs(left_rim - right_rim) / ((left_rim + right_rim) / 2.0)
+        handle_depth = rim_high - handle_low
+
+        # Cup smoothness: R² of the quadratic fit via the least-squares hat matrix
+        vander = np.vander(np.arange(CUP_BARS, dtype=float), 3)
+        hat = vander @ np.linalg.pinv(vander)
+        centered = cup_close - cup_close.mean(axis=-1, keepdims=True)
+        ss_res = ((centered - centered @ hat) ** 2).sum(axis=-1)
+        ss_tot = (centered ** 2).sum(axis=-1)
+        r2 = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.where(ss_res > 0, 0.0, 1.0))
+
+        # Breakout strength (ATR) & volume
+        breakout_price = shifted(close, breakout_offset)
+        if atr is None:
+            atr = np.full(close.shape, np.nan)
+        breakout_atr = shifted(np.asarray(atr, dtype=float), breakout_offset)
+        breakout_excess = breakout_price - handle_high
+
+        if volume is not None:
+            volume = np.asarray(volume, dtype=float)
+            avg_handle_volume = windows(volume, HANDLE_BARS, handle_offset).mean(axis=-1)
+            breakout_volume = shifted(volume, breakout_offset)
+        else:
+            avg_handle_volume = np.full(breakout_price.shape, np.nan)
+            breakout_volume = np.full(breakout_price.shape, np.nan)
+
+        return {
+            "cup_start": np.arange(n_windows),
+            "cup_depth": cup_depth,
+            "avg_candle": avg_candle,
+            "depth_ratio": cup_depth / avg_candle,
+            "cup_low": cup_low_min,
+            "rim_high": rim_high,
+            "rim_asymmetry": rim_asymmetry,
+            "handle_high": handle_high,
+            "handle_low": handle_low,
+            "handle_depth": handle_depth,
+            "retrace_ratio": handle_depth / cup_depth,
+            "r2": r2,
+            "breakout_price": breakout_price,
+            "atr": breakout_atr,
+            "breakout_excess": breakout_excess,
+            "breakout_atr": breakout_excess / breakout_atr,
+            "breakout_volume": breakout_volume,
+            "avg_handle_volume": avg_handle_volume,
+            "volume_ratio": breakout_volume / avg_handle_volume,
+            "has_volume": volume is not None,
+        }
+
+
+# Reasons returned before _validate_cup_handle computes handle depth / R²
+_NO_HANDLE_DEPTH = {"Cup depth too shallow", "Rim levels differ more than 10%", "Handle high above rim"}
+_NO_R2 = _NO_HANDLE_DEPTH | {"Handle retrace too deep", "Handle breaks below cup bottom"}
+
+
+def clean_window_mask(flags) -> np.ndarray:
+    """
+    Windows (cup_start = 0 .. len - MIN_BARS - 1) whose bars, from cup start
+    to breakout, contain no FLAG_BAD bar and no gap after the first bar.
+    Works along the last axis, like compute_window_stats.
+    """
+    flags = np.asarray(flags)
+    n_windows = max(flags.shape[-1] - MIN_BARS, 0)
+    span = CUP_BARS + HANDLE_BARS + 1  # cup start .. breakout, inclusive
+
+    def counts(flag):
+        hits = np.cumsum((flags & flag) != 0, axis=-1)
+        return np.concatenate([np.zeros(flags.shape[:-1] + (1,), dtype=hits.dtype), hits], axis=-1)
+
+    bad, gap = counts(FLAG_BAD), counts(FLAG_GAP)
+    starts = np.arange(n_windows)
+    bad_in_window = bad[..., starts + span] - bad[..., starts]
+    gap_in_window = gap[..., starts + span] - gap[..., starts + 1]
+    return (bad_in_window == 0) & (gap_in_window == 0)
+
+
+def window_pattern(stats: dict, valid, reasons, i: int, cup_start: int = None) -> dict:
+    """
+    find_patterns-style dict for window i of evaluated (1-D) window stats.
+    cup_start defaults to i; values a rule-by-rule check would not have
+    reached (handle_depth, r2) are None, as in _validate_cup_handle.
+    """
+    reason = reasons[i]
+    cup_start = int(i if cup_start is None else cup_start)
+    return {
+        "cup_start": cup_start,
+        "cup_end": cup_start + CUP_BARS - 1,
+        "handle_start": cup_start + CUP_BARS,
+        "handle_end": cup_start + CUP_BARS + HANDLE_BARS - 1,
+        "cup_depth": stats["cup_depth"][i],
+        "cup_duration": CUP_BARS,
+        "handle_depth": None if reason in _NO_HANDLE_DEPTH else stats["handle_depth"][i],
+        "handle_duration": HANDLE_BARS,
+        "breakout": cup_start + CUP_BARS + HANDLE_BARS,
+        "valid": bool(valid[i]),
+        "invalid_reason": reason,
+        "r2": None if reason in _NO_R2 else float(stats["r2"][i]),
+    }
+
+
+def evaluate_window_rules(stats: dict, thresholds: dict = None):
+    """
+    Apply the _validate_cup_handle rules, in the same order, to
+    compute_window_stats output.
+
+    Returns:
+        (valid, invalid_reason): bool array and object array of reasons
+        ("" for valid windows), one entry per window.
+    """
+    t = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    with np.errstate(invalid="ignore"):
+        atr = stats["atr"]
+        checks = [
+            ("Cup depth too shallow", stats["cup_depth"] < t["min_depth_ratio"] * stats["avg_candle"]),
+            ("Rim levels differ more than 10%", stats["rim_asymmetry"] > t["max_rim_asymmetry"]),
+            ("Handle high above rim", stats["handle_high"] > stats["rim_high"]),
+            ("Handle retrace too deep", stats["handle_depth"] > t["max_handle_retrace"] * stats["cup_depth"]),
+            ("Handle breaks below cup bottom", stats["handle_low"] < stats["cup_low"]),
+            ("Cup not parabolic enough (R² too low)", stats["r2"] < t["min_r2"]),
+            ("Breakout not strong enough (ATR filter)",
+             np.isnan(atr) | (stats["breakout_price"] < stats["handle_high"] + t["min_breakout_atr"] * atr)),
+            ("No breakout above handle high", stats["breakout_price"] <= stats["handle_high"]),
+        ]
+        if stats["has_volume"]:
+            checks.append((
+                "Weak breakout volume",
+                stats["breakout_volume"] < t["min_volume_ratio"] * stats["avg_handle_volume"],
+            ))
+
+    reasons, failed = zip(*checks)
+    invalid_reason = np.select(failed, np.array(reasons, dtype=object), default="")
+    return invalid_reason == "", invalid_reason
 
 
 class CupHandleDetector:
-    def __init__(self, df: pd.DataFrame):
-        self.df = df.reset_index(drop=True)
+    def __init__(self, df: "pd.DataFrame", thresholds: dict = None):
+        import pandas as pd
+
+        # Frames that already have a 0..n-1 index (e.g. OHLCVData.symbol_frame) are used as-is
+        index = df.index
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            self.df = df
+        else:
+            self.df = df.reset_index(drop=True)
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self._atr = None
+        self._window_stats = None  # (first window, stats from it on)
+
+    def atr(self):
+        """ATR(14) over the whole series, computed once per detector."""
+        if self._atr is None:
+            import talib
+            self._atr = talib.ATR(
+                np.asarray(self.df["high"].values, dtype=float),
+                np.asarray(self.df["low"].values, dtype=float),
+                np.asarray(self.df["close"].values, dtype=float),
+                timeperiod=14,
+            )
+        return self._atr
 
-    def find_patterns(self, max_images=30):
+    def window_stats(self, start: int = 0):
         """
-        Detect valid Cup & Handle patterns.
+        Raw statistics for the scanned windows from cup_start `start` on (see
+        compute_window_stats; entry k is window start + k, 'cup_start' holds
+        the absolute positions). They do not depend on the thresholds and are
+        computed once per detector: calls for the same or a later start slice
+        the cached arrays, so a tail-only scan never computes earlier windows.
+        """
+        start = max(int(start), 0)
+        if self._window_stats is None or start < self._window_stats[0]:
+            volume = self.df["volume"].values[start:] if "volume" in self.df.columns else None
+            stats = compute_window_stats(
+                self.df["high"].values[start:], self.df["low"].values[start:], self.df["close"].values[start:],
+                volume=volume, atr=self.atr()[start:],
+            )
+            stats["cup_start"] = stats["cup_start"] + start
+            self._window_stats = (start, stats)
+
+        first, stats = self._window_stats
+        return {
+            key: value[start - first:] if isinstance(value, np.ndarray) else value
+            for key, value in stats.items()
+        }
+
+    def find_patterns(self, max_images=30, start=0):
+        """
+        Detect valid Cup & Handle patterns. Data prepared by
+        data_prep.prepare_ohlcv (with a 'bar_flags' column) takes a vectorized
+        fast path that skips windows over gaps or bad bars.
+
+        Args:
+            max_images: maximum number of windows to return.
+            start: first cup_start to scan (earlier windows are skipped).
 
         Returns:
             List of dicts with keys:
@@ -18,15 +297,18 @@ class CupHandleDetector:
             'cup_depth', 'cup_duration', 'handle_depth', 'handle_duration',
             'valid', 'r2', 'invalid_reason'
         """
+        if "bar_flags" in self.df.columns:
+            return self._find_patterns_prepared(max_images, start)
+
         patterns = []
         data_len = len(self.df)
         count = 0
 
-        for i in range(0, data_len - 50):  # minimal 50 bars for a pattern
+        for i in range(start, data_len - MIN_BARS):  # minimal 50 bars for a pattern
             cup_start = i
-            cup_end = i + 30
+            cup_end = i + CUP_BARS - 1
             handle_start = cup_end + 1
-            handle_end = handle_start + 10
+            handle_end = handle_start + HANDLE_BARS - 1
             breakout_idx = handle_end + 1
 
             if handle_end >= data_len or breakout_idx >= data_len or count >= max_images:
@@ -63,6 +345,25 @@ class CupHandleDetector:
 
         return patterns
 
+    def _find_patterns_prepared(self, max_images, start):
+        """
+        find_patterns on data from data_prep.prepare_ohlcv: windows over gaps
+        or bad bars are skipped using the bar flags, and the rules are
+        evaluated at once (evaluate_window_rules) for the windows from `start`
+        up to the last one returned, on the detector's cached window stats.
+        """
+        start = max(int(start), 0)
+        windows = np.flatnonzero(clean_window_mask(self.df["bar_flags"].values[start:]))[:max_images]
+        if len(windows) == 0:
+            return []
+
+        stats = {
+            key: value[:windows[-1] + 1] if isinstance(value, np.ndarray) else value
+            for key, value in self.window_stats(start).items()
+        }
+        valid, reasons = evaluate_window_rules(stats, self.thresholds)
+        return [window_pattern(stats, valid, reasons, i, cup_start=start + i) for i in windows]
+
     def _validate_cup_handle(self, cup_df, handle_df, breakout_price, breakout_idx):
         try:
             # ---------------------------
@@ -70,7 +371,7 @@ class CupHandleDetector:
             # ---------------------------
             avg_candle = (cup_df["high"] - cup_df["low"]).mean()
             cup_depth = cup_df["high"].max() - cup_df["low"].min()
-            if cup_depth < 2 * avg_candle:
+            if cup_depth < self.thresholds["min_depth_ratio"] * avg_candle:
                 return False, "Cup depth too shallow", None, cup_depth, None
 
             # ---------------------------
@@ -93,7 +394,7 @@ class CupHandleDetector:
             rim_avg = (left_rim + right_rim) / 2.0
 
             # Rim symmetry (must not differ > 10%)
-            if abs(left_rim - right_rim) / rim_avg > 0.10:
+            if abs(left_rim - right_rim) / rim_avg > self.thresholds["max_rim_asymmetry"]:
                 return False, "Rim levels differ more than 10%", None, cup_depth, None
 
             # Handle high must not exceed rim
@@ -104,7 +405,7 @@ class CupHandleDetector:
             # Handle depth check (≤ 40% of cup depth)
             # ---------------------------
             handle_depth = max(left_rim, right_rim) - handle_df["low"].min()
-            if handle_depth > 0.4 * cup_depth:
+            if handle_depth > self.thresholds["max_handle_retrace"] * cup_depth:
                 return False, "Handle retrace too deep", None, cup_depth, handle_depth
 
             # ---------------------------
@@ -120,22 +421,21 @@ class CupHandleDetector:
             y = cup_df["close"].values
             coeffs = np.polyfit(x, y, 2)
             y_fit = np.polyval(coeffs, x)
-            r2_val = r2_score(y, y_fit)
-            if r2_val < 0.85:
+            # R² as sklearn's r2_score (constant series: 1.0 for a perfect fit, else 0.0)
+            ss_res = float(((y - y_fit) ** 2).sum())
+            ss_tot = float(((y - y.mean()) ** 2).sum())
+            r2_val = 1.0 - ss_res / ss_tot if ss_tot > 0 else (0.0 if ss_res > 0 else 1.0)
+            if r2_val < self.thresholds["min_r2"]:
                 return False, "Cup not parabolic enough (R² too low)", r2_val, cup_depth, handle_depth
 
             # ---------------------------
             # Breakout strength (ATR filter)
             # ---------------------------
-            high = self.df["high"].values
-            low = self.df["low"].values
-            close = self.df["close"].values
-            atr = talib.ATR(high, low, close, timeperiod=14)
-
-            atr_breakout = atr[breakout_idx]
+            atr_breakout = self.atr()[breakout_idx]
             handle_high = handle_df["high"].max()
 
-            if np.isnan(atr_breakout) or breakout_price < handle_high + 1.5 * atr_breakout:
+            min_breakout = handle_high + self.thresholds["min_breakout_atr"] * atr_breakout
+            if np.isnan(atr_breakout) or breakout_price < min_breakout:
                 return False, "Breakout not strong enough (ATR filter)", r2_val, cup_depth, handle_depth
 
             # ---------------------------
@@ -150,7 +450,7 @@ class CupHandleDetector:
             if "volume" in self.df.columns:
                 avg_handle_vol = handle_df["volume"].mean()
                 breakout_vol = self.df.iloc[breakout_idx]["volume"]
-                if breakout_vol < 1.5 * avg_handle_vol:
+                if breakout_vol < self.thresholds["min_volume_ratio"] * avg_handle_vol:
                     return False, "Weak breakout volume", r2_val, cup_depth, handle_depth
 
             # ✅ All checks passed
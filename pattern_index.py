@@ -0,0 +1,233 @@
+import os
+import glob
+import numpy as np
+import pandas as pd
+
+SHAPE_LENGTH = 64
+BLOCK_SIZE = 65536  # stored vectors scanned per block during a query
+COMPACT_ROWS = 65536  # on save, trailing chunks smaller than this are merged into one
+
+
+def _chunk_files(path: str) -> list:
+    """chunk_N.npy files under path, in chunk number order."""
+    files = glob.glob(os.path.join(path, "chunk_*.npy"))
+    return sorted(files, key=lambda f: int(os.path.basename(f)[len("chunk_"):-len(".npy")]))
+
+
+def _write_chunk(name: str, vectors: np.ndarray, meta: pd.DataFrame):
+    """Write one chunk (.npy + .csv metadata when it has columns), replacing files atomically."""
+    with open(name + ".npy.tmp", "wb") as f:
+        np.save(f, vectors)
+    os.replace(name + ".npy.tmp", name + ".npy")
+    if len(meta.columns):
+        meta.to_csv(name + ".csv.tmp", index=False)
+        os.replace(name + ".csv.tmp", name + ".csv")
+    elif os.path.exists(name + ".csv"):
+        os.remove(name + ".csv")
+
+
+def shape_vectors(close, starts, ends, length=SHAPE_LENGTH):
+    """
+    Resample close[start:end+1] of every pattern to a fixed-length,
+    z-score normalised shape vector (linear interpolation, no Python loop).
+
+    Returns:
+        float32 array of shape (n_patterns, length).
+    """
+    close = np.asarray(close, dtype=float)
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+
+    positions = starts[:, None] + (ends - starts)[:, None] * np.linspace(0.0, 1.0, length)[None, :]
+    left = np.floor(positions).astype(np.int64)
+    right = np.minimum(left + 1, len(close) - 1)
+    frac = positions - left
+    resampled = close[left] * (1.0 - frac) + close[right] * frac
+
+    mean = resampled.mean(axis=1, keepdims=True)
+    std = resampled.std(axis=1, keepdims=True)
+    std[std == 0] = 1.0
+    return ((resampled - mean) / std).astype(np.float32)
+
+
+class PatternIndex:
+    """
+    k-nearest-neighbour index over pattern shape vectors.
+
+    Vectors are kept in a blocked brute-force NumPy index. On disk the index
+    is a folder of chunks (chunk_NNNNN.npy + optional .csv metadata); save() only
+    writes vectors added since the last save, so updates are incremental, and
+    merges them with trailing chunks smaller than compact_rows so frequent
+    small updates do not grow the file count without bound.
+    """
+
+    def __init__(self, path: str, length: int = SHAPE_LENGTH, compact_rows: int = COMPACT_ROWS):
+        self.path = path
+        self.length = length
+        self.compact_rows = compact_rows
+        self._blocks = []       # list of float32 arrays
+        self._meta = []         # list of DataFrames aligned with _blocks
+        self._saved = 0         # number of blocks already on disk
+        self._matrix = None
+        self._norms = None
+        self._meta_all = None
+
+    def __len__(self):
+        return sum(len(b) for b in self._blocks)
+
+    # ---------------------------
+    # Building
+    # ---------------------------
+    def add(self, vectors, meta: pd.DataFrame = None):
+        """Append shape vectors with optional per-vector metadata."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.length:
+            raise ValueError(f"Expected vectors of shape (n, {self.length}), got {vectors.shape}")
+        if meta is None:
+            meta = pd.DataFrame(index=range(len(vectors)))
+        if len(meta) != len(vectors):
+            raise ValueError("meta must have one row per vector")
+
+        self._blocks.append(vectors)
+        self._meta.append(meta.reset_index(drop=True))
+        self._matrix = self._norms = self._meta_all = None
+
+    def add_patterns(self, df: pd.DataFrame, patterns, symbol: str, extra: pd.DataFrame = None):
+        """
+        Add detector output for one symbol. Each vector spans cup_start..handle_end.
+
+        Args:
+            df: price DataFrame the patterns were detected on.
+            patterns: list of pattern dicts from find_patterns.
+            extra: optional columns (e.g. backtest outcomes) aligned with patterns.
+        """
+        if not patterns:
+            return
+        starts = np.array([p["cup_start"] for p in patterns])
+        ends = np.array([p["handle_end"] for p in patterns])
+        meta = pd.DataFrame({
+            "symbol": symbol,
+            "cup_start": starts,
+            "handle_end": ends,
+            "valid": [bool(p["valid"]) for p in patterns],
+        })
+        if "timestamp" in df.columns:
+            meta["cup_start_time"] = df["timestamp"].values[starts]
+        if extra is not None:
+            meta = pd.concat([meta, extra.reset_index(drop=True)], axis=1)
+        self.add(shape_vectors(df["close"].values, starts, ends, self.length), meta)
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self):
+        """
+        Write vectors added since the last save/load. Trailing chunks on disk
+        with fewer than compact_rows vectors are merged with them into one
+        chunk (compact_rows=0 writes one chunk per added block).
+        """
+        os.makedirs(self.path, exist_ok=True)
+        new_blocks = self._blocks[self._saved:]
+        new_meta = self._meta[self._saved:]
+        if not new_blocks:
+            return
+        files = _chunk_files(self.path)
+        next_number = int(os.path.basename(files[-1])[len("chunk_"):-len(".npy")]) + 1 if files else 0
+
+        if self.compact_rows <= 0:
+            for offset, (block, meta) in enumerate(zip(new_blocks, new_meta)):
+                _write_chunk(os.path.join(self.path, f"chunk_{next_number + offset:05d}"), block, meta)
+            self._saved = len(self._blocks)
+            return
+
+        # Trailing small chunks are rewritten together with the new vectors
+        tail = []
+        while files and len(np.load(files[-1], mmap_mode="r")) < self.compact_rows:
+            tail.insert(0, files.pop())
+        blocks, metas = [], []
+        for npy in tail:
+            blocks.append(np.load(npy))
+            meta_file = npy[:-4] + ".csv"
+            if os.path.exists(meta_file):
+                metas.append(pd.read_csv(meta_file))
+            else:
+                metas.append(pd.DataFrame(index=range(len(blocks[-1]))))
+        blocks += new_blocks
+        metas += new_meta
+
+        name = tail[0][:-4] if tail else os.path.join(self.path, f"chunk_{next_number:05d}")
+        _write_chunk(name, np.concatenate(blocks), pd.concat(metas, ignore_index=True))
+        for npy in tail[1:]:
+            os.remove(npy)
+            if os.path.exists(npy[:-4] + ".csv"):
+                os.remove(npy[:-4] + ".csv")
+        self._saved = len(self._blocks)
+
+    @classmethod
+    def load(cls, path: str, length: int = SHAPE_LENGTH, compact_rows: int = COMPACT_ROWS):
+        """Load every chunk under path, in chunk number order (missing folder → empty index)."""
+        index = cls(path, length, compact_rows)
+        for npy in _chunk_files(path):
+            vectors = np.load(npy)
+            meta_file = npy[:-4] + ".csv"
+            meta = pd.read_csv(meta_file) if os.path.exists(meta_file) else None
+            index.add(vectors, meta)
+        index._saved = len(index._blocks)
+        return index
+
+    # ---------------------------
+    # Querying
+    # ---------------------------
+    def _ensure_matrix(self):
+        if self._matrix is None:
+            if self._blocks:
+                self._matrix = np.concatenate(self._blocks)
+                self._meta_all = pd.concat(self._meta, ignore_index=True)
+            else:
+                self._matrix = np.empty((0, self.length), dtype=np.float32)
+                self._meta_all = pd.DataFrame()
+            self._norms = np.einsum("ij,ij->i", self._matrix, self._matrix)
+        return self._matrix
+
+    def query(self, vectors, k: int = 10, block_size: int = BLOCK_SIZE):
+        """
+        k nearest stored vectors (Euclidean) for each query vector.
+
+        Returns:
+            (distances, indices): float and int arrays of shape (n_queries, k'),
+            sorted by distance, with k' = min(k, len(index)).
+        """
+        matrix = self._ensure_matrix()
+        queries = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        k = min(k, len(matrix))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty, empty.astype(np.int64)
+
+        q_norms = np.einsum("ij,ij->i", queries, queries)
+        best_d = np.full((len(queries), 0), np.inf, dtype=np.float32)
+        best_i = np.empty((len(queries), 0), dtype=np.int64)
+
+        for lo in range(0, len(matrix), block_size):
+            block = matrix[lo:lo + block_size]
+            d2 = q_norms[:, None] - 2.0 * (queries @ block.T) + self._norms[None, lo:lo + block_size]
+            kk = min(k, block.shape[0])
+            part = np.argpartition(d2, kk - 1, axis=1)[:, :kk]
+
+            cand_d = np.concatenate([best_d, np.take_along_axis(d2, part, axis=1)], axis=1)
+            cand_i = np.concatenate([best_i, part + lo], axis=1)
+            keep = np.argpartition(cand_d, min(k, cand_d.shape[1]) - 1, axis=1)[:, :k]
+            best_d = np.take_along_axis(cand_d, keep, axis=1)
+            best_i = np.take_along_axis(cand_i, keep, axis=1)
+
+        order = np.argsort(best_d, axis=1)
+        distances = np.sqrt(np.maximum(np.take_along_axis(best_d, order, axis=1), 0.0))
+        return distances, np.take_along_axis(best_i, order, axis=1)
+
+    def similar(self, close, start: int, end: int, k: int = 10) -> pd.DataFrame:
+        """Metadata of the k stored patterns most similar to close[start:end+1]."""
+        vector = shape_vectors(close, [start], [end], self.length)
+        distances, indices = self.query(vector, k=k)
+        result = self._meta_all.iloc[indices[0]].reset_index(drop=True)
+        result.insert(0, "distance", distances[0])
+        return result
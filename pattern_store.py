@@ -0,0 +1,179 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import config
+
+# Report columns persisted per pattern (besides the key columns)
+COLUMNS = {
+    "cup_start": "INTEGER",
+    "cup_end": "INTEGER",
+    "handle_start": "INTEGER",
+    "handle_end": "INTEGER",
+    "breakout": "INTEGER",
+    "cup_depth": "REAL",
+    "cup_duration": "INTEGER",
+    "handle_depth": "REAL",
+    "handle_duration": "INTEGER",
+    "valid": "INTEGER",
+    "invalid_reason": "TEXT",
+    "r2": "REAL",
+    "ml_valid": "INTEGER",
+    "confidence": "REAL",
+    "png_file": "TEXT",
+    "html_file": "TEXT",
+}
+KEY_COLUMNS = ["symbol", "cup_start_time", "breakout_time"]
+BOOL_COLUMNS = ["valid", "ml_valid"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS patterns (
+    symbol TEXT NOT NULL,
+    cup_start_time INTEGER NOT NULL,
+    breakout_time INTEGER NOT NULL,
+    {", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())},
+    PRIMARY KEY (symbol, cup_start_time, breakout_time)
+);
+CREATE INDEX IF NOT EXISTS idx_patterns_symbol_time_valid
+    ON patterns (symbol, cup_start_time, valid);
+"""
+
+
+def _to_epoch_ns(values):
+    """
+    Timestamps (datetime-like, strings or ints) → int64 nanoseconds since epoch.
+    Tz-aware values (e.g. ISO strings with offsets) are converted to UTC;
+    naive values are taken as UTC already.
+    """
+    series = pd.Series(values)
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype("int64")
+    stamps = pd.to_datetime(series, utc=True).dt.tz_convert(None)
+    return stamps.astype("datetime64[ns]").astype("int64")
+
+
+def _sql_value(value):
+    """Convert NumPy / pandas scalars to types sqlite3 accepts."""
+    if value is None:
+        return None
+    if isinstance(value, (np.bool_, bool)):
+        return int(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class PatternStore:
+    """
+    Persistent pattern history in a local SQLite file.
+
+    Rows are keyed on (symbol, cup_start_time, breakout_time), so re-running
+    detection over the same bars updates rows instead of duplicating them.
+    """
+
+    def __init__(self, path: str = config.PATTERN_DB):
+        self.path = path
+        # Usable from another thread (e.g. the pipeline writer), one thread at a time
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM patterns").fetchone()[0]
+
+    def upsert(self, rows) -> int:
+        """
+        Insert or update patterns in one transaction.
+
+        Args:
+            rows: DataFrame or list of report-row dicts. Must contain 'symbol',
+                'cup_start_time' and 'breakout_time'; other COLUMNS are optional.
+
+        Returns:
+            Number of rows that were not in the store before.
+        """
+        frame = pd.DataFrame(rows)
+        if frame.empty:
+            return 0
+        missing = [c for c in KEY_COLUMNS if c not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing key columns: {missing}")
+
+        frame = frame.copy()
+        frame["cup_start_time"] = _to_epoch_ns(frame["cup_start_time"]).values
+        frame["breakout_time"] = _to_epoch_ns(frame["breakout_time"]).values
+        columns = KEY_COLUMNS + [c for c in COLUMNS if c in frame.columns]
+
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[len(KEY_COLUMNS):])
+        sql = (
+            f"INSERT INTO patterns ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)}) "
+            f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) "
+            + (f"DO UPDATE SET {updates}" if updates else "DO NOTHING")
+        )
+        values = [
+            tuple(_sql_value(v) for v in row)
+            for row in frame[columns].itertuples(index=False, name=None)
+        ]
+
+        before = len(self)
+        with self.conn:
+            self.conn.executemany(sql, values)
+        return len(self) - before
+
+    def _select(self, symbol=None, start=None, end=None, valid=None, columns=None):
+        if columns:
+            unknown = [c for c in columns if c not in KEY_COLUMNS and c not in COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown columns: {unknown}")
+        clauses, params = [], []
+        if symbol is not None:
+            symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+            clauses.append(f"symbol IN ({', '.join('?' for _ in symbols)})")
+            params.extend(symbols)
+        if start is not None:
+            clauses.append("cup_start_time >= ?")
+            params.append(int(_to_epoch_ns([start]).iloc[0]))
+        if end is not None:
+            clauses.append("cup_start_time < ?")
+            params.append(int(_to_epoch_ns([end]).iloc[0]))
+        if valid is not None:
+            clauses.append("valid = ?")
+            params.append(int(bool(valid)))
+
+        selected = ", ".join(columns) if columns else "*"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {selected} FROM patterns{where} ORDER BY symbol, cup_start_time"
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def query(self, symbol=None, start=None, end=None, valid=None, columns=None) -> pd.DataFrame:
+        """
+        Patterns filtered by symbol(s), cup_start_time range [start, end) and validity.
+
+        Returns:
+            DataFrame with timestamps as datetimes and validity flags as booleans.
+        """
+        frame = self._select(symbol, start, end, valid, columns)
+        for col in ("cup_start_time", "breakout_time"):
+            if col in frame.columns:
+                frame[col] = pd.to_datetime(frame[col], unit="ns")
+        for col in BOOL_COLUMNS:
+            if col in frame.columns:
+                frame[col] = frame[col].map({1: True, 0: False})
+        return frame
+
+    def query_arrays(self, symbol=None, start=None, end=None, valid=None, columns=None) -> dict:
+        """Same filters as query(); returns a dict of NumPy arrays (timestamps as int64 ns)."""
+        frame = self._select(symbol, start, end, valid, columns)
+        return {col: frame[col].to_numpy() for col in frame.columns}
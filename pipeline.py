@@ -0,0 +1,87 @@
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+_SYMBOL_DONE = object()
+_STOP = object()
+
+
+def run_pipeline(detections, render, on_rendered, on_symbol_done=None,
+                 render_workers=4, queue_size=32, executor="thread"):
+    """
+    Run detect → render → write as overlapping stages.
+
+    - Detection runs in the calling thread by iterating `detections`, an
+      iterable of (symbol, tasks) pairs.
+    - Each task is rendered by `render(symbol, task)` in a thread pool, or in
+      a process pool with executor="process" (render and tasks must then be
+      picklable; use it when rendering is CPU-bound Python code).
+    - A single writer thread calls `on_rendered(symbol, task, result)` for
+      every task and `on_symbol_done(symbol)` after each symbol's last task,
+      strictly in submission order, so output matches the sequential path.
+
+    The queue between detection and the writer holds at most `queue_size`
+    in-flight tasks; detection blocks when it is full (backpressure).
+    An exception in any stage stops the pipeline and is re-raised here.
+    """
+    pending = queue.Queue(maxsize=queue_size)
+    failed = threading.Event()
+    errors = []
+
+    def writer():
+        while True:
+            item = pending.get()
+            if item is _STOP:
+                return
+            if failed.is_set():
+                continue  # discard remaining work after a failure
+            symbol, task, future = item
+            try:
+                if task is _SYMBOL_DONE:
+                    if on_symbol_done:
+                        on_symbol_done(symbol)
+                else:
+                    on_rendered(symbol, task, future.result())
+            except BaseException as e:
+                errors.append(e)
+                failed.set()
+
+    def put(item):
+        while not failed.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("pipeline stopped")
+
+    if executor == "process":
+        # spawn: workers must not inherit the writer thread's locks
+        pool = ProcessPoolExecutor(
+            max_workers=render_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    elif executor == "thread":
+        pool = ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix="pipeline-render")
+    else:
+        raise ValueError(f"Unknown executor: {executor!r} (expected 'thread' or 'process')")
+
+    writer_thread = threading.Thread(target=writer, name="pipeline-writer", daemon=True)
+    writer_thread.start()
+
+    try:
+        for symbol, tasks in detections:
+            for task in tasks:
+                put((symbol, task, pool.submit(render, symbol, task)))
+            put((symbol, _SYMBOL_DONE, None))
+    except BaseException as e:
+        if not failed.is_set():
+            errors.append(e)
+            failed.set()
+    finally:
+        pending.put(_STOP)
+        writer_thread.join()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if errors:
+        raise errors[0]
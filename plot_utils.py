@@ -1,5 +1,8 @@
 import os
-import matplotlib.pyplot as plt
+import json
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PolyCollection
 import plotly.graph_objects as go
 import config
 
@@ -7,17 +10,19 @@ import config
 def save_pattern_plot(pat, symbol, pattern_id):
     """
     Save static PNG plot using matplotlib (reliable).
+    Uses the object-oriented Figure API (no pyplot state), so it is safe to
+    call from worker threads.
     """
     df = pat["df"]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
     ax.plot(df["timestamp"], df["close"], label="Price", color="blue")
     ax.set_title(f"Cup & Handle Pattern - {symbol} (ID {pattern_id})")
     ax.legend()
 
     filepath = os.path.join(config.PATTERNS_DIR, f"cup_handle_{pattern_id}.png")
-    plt.savefig(filepath)
-    plt.close(fig)
+    fig.savefig(filepath)
 
     return filepath
 
@@ -49,6 +54,72 @@ def save_pattern_html(pat, symbol, pattern_id):
     return filepath
 
 
-
-
-
+def save_pattern_montage(items, filepath=None, ncols=10, tile_size=(2.0, 1.4), dpi=80, labels=True):
+    """
+    Save many patterns as tiles of one PNG, drawn and encoded once.
+
+    Each pattern's close series is scaled into its own tile of a single axes
+    and all tiles are drawn as one LineCollection, so the cost grows with the
+    number of points rather than with per-figure setup.
+
+    Args:
+        items: list of (pattern_id, symbol, pat) with pat["df"] as in save_pattern_plot.
+        filepath: PNG path (default: patterns/montage.png). The tile index is
+            written next to it as JSON.
+        labels: draw "<pattern_id> <symbol>" in each tile (text is the
+            slowest part of the render; the JSON index works without it).
+
+    Returns:
+        dict: pattern_id → {"symbol", "row", "col", "bbox": [x0, y0, x1, y1]}
+        where bbox is the tile in image pixels (origin top-left).
+    """
+    if filepath is None:
+        filepath = os.path.join(config.PATTERNS_DIR, "montage.png")
+    n = len(items)
+    ncols = max(1, min(ncols, n))
+    nrows = max(1, -(-n // ncols))
+    width, height = ncols * tile_size[0], nrows * tile_size[1]
+
+    fig = Figure(figsize=(width, height), dpi=dpi)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, ncols)
+    ax.set_ylim(nrows, 0)
+    ax.set_axis_off()
+
+    pad, label_space = 0.08, 0.12
+    segments, colors, tiles = [], [], []
+    index = {}
+    for k, (pattern_id, symbol, pat) in enumerate(items):
+        row, col = divmod(k, ncols)
+        close = np.asarray(pat["df"]["close"], dtype=float)
+
+        # Scale the series into the tile box [col, col+1] × [row, row+1]
+        lo, hi = np.nanmin(close), np.nanmax(close)
+        y = (close - lo) / (hi - lo) if hi > lo else np.full(len(close), 0.5)
+        x = np.linspace(0.0, 1.0, len(close))
+        segments.append(np.column_stack([
+            col + pad + x * (1 - 2 * pad),
+            row + 1 - pad - y * (1 - 2 * pad - label_space),
+        ]))
+        colors.append("green" if pat.get("valid") else "red")
+        tiles.append([(col, row), (col + 1, row), (col + 1, row + 1), (col, row + 1)])
+        if labels:
+            ax.text(col + pad, row + pad, f"{pattern_id} {symbol}", fontsize=6, va="top")
+
+        px_w, px_h = tile_size[0] * dpi, tile_size[1] * dpi
+        index[pattern_id] = {
+            "symbol": symbol,
+            "row": row,
+            "col": col,
+            "bbox": [round(col * px_w), round(row * px_h), round((col + 1) * px_w), round((row + 1) * px_h)],
+        }
+
+    ax.add_collection(PolyCollection(tiles, facecolors="none", edgecolors="lightgray", linewidths=0.5))
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=0.8))
+    # Fast zlib level: the montage is large and mostly blank
+    fig.savefig(filepath, dpi=dpi, pil_kwargs={"compress_level": 1})
+
+    with open(os.path.splitext(filepath)[0] + ".json", "w") as f:
+        json.dump({str(k): v for k, v in index.items()}, f)
+
+    return index
@@ -0,0 +1,178 @@
+import os
+import json
+import hashlib
+import joblib
+import numpy as np
+import pandas as pd
+from pattern_detector import CupHandleDetector, DEFAULT_THRESHOLDS, MIN_BARS
+from features import FEATURE_VERSION, detector_features, attach_features
+import config
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume", "bar_flags"]
+# Modules whose code determines cached patterns, features and scores
+CODE_SOURCES = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ("pattern_detector.py", "features.py", "data_prep.py", os.path.join("utils", "pattern_classifier.py"))
+]
+
+
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+    return h.hexdigest()
+
+
+def file_version(path) -> str:
+    """Content hash of a file (None if it does not exist)."""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return _digest(f.read())
+
+
+def code_version(paths=CODE_SOURCES) -> str:
+    """Combined content hash of several source files."""
+    return _digest(*(f"{os.path.basename(p)}:{file_version(p)}" for p in paths))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """One uint64 hash per bar over the OHLCV columns present in df."""
+    cols = [c for c in OHLCV_COLUMNS if c in df.columns]
+    return pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+
+
+def data_fingerprint(hashes: np.ndarray, n_rows: int = None) -> str:
+    """Fingerprint of the first n_rows bars (all bars by default)."""
+    return _digest(np.ascontiguousarray(hashes[:n_rows]).tobytes())
+
+
+class ResultCache:
+    """
+    On-disk cache of detector output and classifier scores per symbol.
+
+    Entries are keyed on the symbol, detection parameters and the content of
+    CODE_SOURCES (detector, features, data prep, classifier); each entry records the fingerprint of the bars it was
+    computed on. Classifier scores are tagged with the model file's hash and
+    recomputed only when the model changes.
+    """
+
+    def __init__(self, cache_dir: str = config.CACHE_DIR, code_sources=CODE_SOURCES):
+        self.cache_dir = cache_dir
+        self.code_version = code_version(code_sources)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, symbol: str, params: dict) -> str:
+        key = _digest(symbol, json.dumps(params, sort_keys=True), self.code_version)
+        return os.path.join(self.cache_dir, f"{symbol}_{key}.pkl")
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+    def scan(self, symbol: str, df_symbol: pd.DataFrame, max_images: int = 30,
+             thresholds: dict = None, classifier=None):
+        """
+        Detect (and optionally classify) patterns, reusing cached results.
+        Patterns carry their window features (features.FEATURE_COLUMNS).
+
+        - Same bars as the cached entry: nothing is recomputed.
+        - Cached bars are a prefix of df_symbol (append-only data): cached
+          windows are kept and only windows reaching into the new bars are scanned.
+        - Otherwise: full scan.
+
+        Returns:
+            (patterns, predictions, status): predictions is a list of
+            (ml_valid, confidence) aligned with patterns ((None, None) without a
+            classifier); status is 'hit', 'prefix' or 'miss'.
+        """
+        lookup = self._lookup(symbol, df_symbol, max_images, thresholds)
+        return self._complete(lookup, df_symbol, max_images, thresholds, classifier)
+
+    def scan_many(self, frames: dict, max_images: int = 30, thresholds: dict = None,
+                  classifier=None, detect_many=None) -> dict:
+        """
+        scan() for several symbols ({symbol: df_symbol}).
+
+        Symbols without a usable entry are detected together by
+        detect_many(symbols) → {symbol: patterns with features}, e.g.
+        batch_find_patterns; its results must match find_patterns, since they
+        share entries with scan(). Hits and prefixes are handled as in scan().
+
+        Returns:
+            {symbol: (patterns, predictions, status)}
+        """
+        lookups = {
+            symbol: self._lookup(symbol, df_symbol, max_images, thresholds)
+            for symbol, df_symbol in frames.items()
+        }
+        missed = [symbol for symbol, lookup in lookups.items() if lookup["status"] == "miss"]
+        detected = detect_many(missed) if missed and detect_many is not None else {}
+        return {
+            symbol: self._complete(lookups[symbol], frames[symbol], max_images, thresholds, classifier,
+                                   detected=detected.get(symbol))
+            for symbol in frames
+        }
+
+    def _lookup(self, symbol, df_symbol, max_images, thresholds) -> dict:
+        """Cache entry for the symbol/params and whether it covers the bars ('hit', 'prefix', 'miss')."""
+        params = {
+            "max_images": max_images,
+            "thresholds": {**DEFAULT_THRESHOLDS, **(thresholds or {})},
+            "feature_version": FEATURE_VERSION,
+        }
+        path = self._path(symbol, params)
+        entry = self._load(path)
+        hashes = row_hashes(df_symbol)
+
+        status = "miss"
+        if entry is not None and entry["n_rows"] <= len(df_symbol):
+            if entry["fingerprint"] == data_fingerprint(hashes, entry["n_rows"]):
+                status = "hit" if entry["n_rows"] == len(df_symbol) else "prefix"
+        return {"path": path, "entry": entry, "status": status, "fingerprint": data_fingerprint(hashes)}
+
+    def _complete(self, lookup, df_symbol, max_images, thresholds, classifier, detected=None):
+        """Detect what the entry lacks (or take `detected` on a miss), classify, save."""
+        path, entry, status = lookup["path"], lookup["entry"], lookup["status"]
+        patterns = list(entry["patterns"]) if status != "miss" else []
+
+        # ---------------------------
+        # Detection
+        # ---------------------------
+        if status == "prefix" and len(patterns) < max_images:
+            # Window stats and features only for the windows reaching into new bars
+            start = max(entry["n_rows"] - MIN_BARS, 0)
+            detector = CupHandleDetector(df_symbol, thresholds=thresholds)
+            new = detector.find_patterns(max_images=max_images - len(patterns), start=start)
+            patterns += attach_features(new, detector_features(detector, start), start)
+        elif status == "miss" and detected is not None:
+            patterns = list(detected)
+        elif status == "miss":
+            detector = CupHandleDetector(df_symbol, thresholds=thresholds)
+            patterns = attach_features(detector.find_patterns(max_images=max_images), detector_features(detector))
+
+        # ---------------------------
+        # Classification
+        # ---------------------------
+        model_version = file_version(classifier.model_path) if classifier else None
+        predictions = []
+        if status != "miss" and classifier and entry["model_version"] == model_version:
+            predictions = list(entry["predictions"])
+        unscored = patterns[len(predictions):]
+        predictions += classifier.predict_many(unscored) if classifier else [(None, None)] * len(unscored)
+
+        if status != "hit" or entry["model_version"] != model_version:
+            joblib.dump({
+                "n_rows": len(df_symbol),
+                "fingerprint": lookup["fingerprint"],
+                "patterns": [dict(p) for p in patterns],
+                "model_version": model_version,
+                "predictions": predictions,
+            }, path)
+
+        return [dict(p) for p in patterns], predictions, status
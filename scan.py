@@ -0,0 +1,151 @@
+# Scan-only entry point: detection with NumPy and the detector core only
+# (no pandas, TA-Lib, scikit-learn or plotting), for cron jobs and short-lived
+# containers. Bars are prepared like data_prep.prepare_ohlcv, so results match
+# CupHandleDetector.find_patterns on prepared data (ATR via wilder_atr).
+
+import csv
+import argparse
+import numpy as np
+from pattern_detector import (
+    compute_window_stats, evaluate_window_rules, clean_window_mask, window_pattern, wilder_atr,
+    FLAG_GAP, FLAG_BAD,
+)
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+REPORT_COLUMNS = [
+    "symbol", "cup_start_time", "breakout_time", "cup_start", "cup_end", "handle_start",
+    "handle_end", "cup_depth", "cup_duration", "handle_depth", "handle_duration",
+    "breakout", "valid", "invalid_reason", "r2",
+]
+
+
+def read_ohlcv_csv(path: str) -> dict:
+    """
+    raw_data.csv-style file → {symbol: {column: array}}, bars in file order.
+    Timestamps are kept as strings; empty numeric fields become NaN.
+    """
+    columns = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            bars = columns.setdefault(row.get("symbol", ""), {})
+            for key, value in row.items():
+                bars.setdefault(key, []).append(value)
+
+    series = {}
+    for symbol, bars in columns.items():
+        arrays = {"timestamp": np.array(bars["timestamp"])}
+        for col in ("open", "high", "low", "close", "volume", "bar_flags"):
+            if col in bars:
+                values = np.array(bars[col])
+                values = np.where(values == "", "nan", values).astype(float)
+                arrays[col] = values.astype(np.uint8) if col == "bar_flags" else values
+        series[symbol] = arrays
+    return series
+
+
+def _carry_close_forward(arrays: dict, rows: np.ndarray):
+    """Replace OHLC of `rows` with the previous (else next) close."""
+    close = np.where(rows, np.nan, arrays["close"])
+    known = np.flatnonzero(~np.isnan(close))
+    if len(known) == 0:
+        return
+    # Nearest known bar at or before each bar, else the first known one after it
+    source = known[np.maximum(np.searchsorted(known, np.arange(len(close)), side="right") - 1, 0)]
+    for col in PRICE_COLUMNS:
+        if col in arrays:
+            arrays[col] = np.where(rows, close[source], arrays[col])
+
+
+def prepare_series(series: dict) -> dict:
+    """
+    data_prep.prepare_ohlcv (default options) on read_ohlcv_csv output, with
+    NumPy only: bars sorted by time, duplicate bars dropped (last kept), bad
+    OHLC flagged FLAG_BAD (non-finite prices replaced by the previous close)
+    and bars after a gap longer than the median bar interval flagged FLAG_GAP.
+    """
+    prepared = {}
+    for symbol, arrays in series.items():
+        ts = arrays["timestamp"].astype("datetime64[ns]").view(np.int64)
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.r_[ts[1:] != ts[:-1], True] if len(ts) else np.zeros(0, dtype=bool)
+        arrays = {col: values[order][keep] for col, values in arrays.items()}
+        arrays["_ts"] = ts[keep]
+
+        prices = np.column_stack([arrays.get(col, arrays["close"]) for col in PRICE_COLUMNS])
+        volume = arrays.get("volume", np.zeros(len(prices)))
+        with np.errstate(invalid="ignore"):
+            non_finite = ~np.isfinite(prices).all(axis=1) | (prices <= 0).any(axis=1) | ~np.isfinite(volume)
+            o, h, l, c = prices.T
+            inconsistent = (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (h < l)
+        if non_finite.any():
+            _carry_close_forward(arrays, non_finite)
+            if "volume" in arrays:
+                arrays["volume"] = np.where(np.isfinite(volume), volume, 0.0)
+        arrays["bar_flags"] = np.where(non_finite | inconsistent, FLAG_BAD, 0).astype(np.uint8)
+        prepared[symbol] = arrays
+
+    # Gaps: one bar interval (median step) shared by all symbols, as in prepare_ohlcv
+    steps = np.concatenate([np.diff(arrays["_ts"]) for arrays in prepared.values()] or [np.zeros(0)])
+    interval = int(np.median(steps)) if len(steps) else 0
+    for arrays in prepared.values():
+        step = np.diff(arrays.pop("_ts"), prepend=0)
+        if interval > 0 and len(step):
+            step[0] = 0
+            arrays["bar_flags"][step > interval] |= FLAG_GAP
+    return prepared
+
+
+def scan_series(arrays: dict, max_images: int = 30, start: int = 0, thresholds: dict = None) -> list:
+    """find_patterns over one symbol's arrays (windows over flagged bars are skipped)."""
+    high, low, close = arrays["high"], arrays["low"], arrays["close"]
+    stats = compute_window_stats(
+        high, low, close, volume=arrays.get("volume"), atr=wilder_atr(high, low, close)
+    )
+    valid, reasons = evaluate_window_rules(stats, thresholds)
+    scan = np.ones(len(valid), dtype=bool)
+    if "bar_flags" in arrays:
+        scan = clean_window_mask(arrays["bar_flags"])
+    scan[:start] = False
+    return [window_pattern(stats, valid, reasons, i) for i in np.flatnonzero(scan)[:max_images]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan-only Cup & Handle detection (no rendering, no model)")
+    parser.add_argument("--csv", type=str, default="data/raw_data.csv", help="OHLCV CSV to scan")
+    parser.add_argument("--symbols", nargs="+", default=None, help="Symbols to scan (default: all)")
+    parser.add_argument("--max-images", type=int, default=30, help="Max windows per symbol")
+    parser.add_argument("--valid-only", action="store_true", help="Only output windows passing every rule")
+    parser.add_argument("--out", type=str, default=None, help="Write patterns to this CSV")
+    args = parser.parse_args(argv)
+
+    series = prepare_series(read_ohlcv_csv(args.csv))
+    rows = []
+    for symbol in args.symbols or list(series):
+        arrays = series[symbol]
+        patterns = scan_series(arrays, max_images=args.max_images)
+        valid_count = sum(1 for p in patterns if p["valid"])
+        print(f"Detected {valid_count} valid cup & handle patterns for {symbol}.")
+
+        for pat in patterns:
+            if args.valid_only and not pat["valid"]:
+                continue
+            rows.append({
+                "symbol": symbol,
+                "cup_start_time": arrays["timestamp"][pat["cup_start"]],
+                "breakout_time": arrays["timestamp"][pat["breakout"]],
+                **pat,
+            })
+
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Scan results saved to {args.out} ({len(rows)} rows)")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import os
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import pandas as pd
+from ohlcv_data import OHLCVData
+from data_prep import prepare_ohlcv
+from pattern_detector import CupHandleDetector, CUP_BARS, HANDLE_BARS
+from pattern_store import PatternStore
+from features import detector_features, attach_features
+import config
+
+MAX_BODY_BYTES = 1_000_000
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(value))
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _json_safe(value):
+    """NaN/inf floats (incl. NumPy float64, a float subclass) → None, recursively."""
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, (float, np.floating)) and not np.isfinite(value):
+        return None
+    return value
+
+
+def _encode(payload) -> bytes:
+    """JSON body; strict (allow_nan=False) so invalid JSON can never be sent."""
+    return json.dumps(_json_safe(payload), default=_json_default, allow_nan=False).encode()
+
+
+class ScanService:
+    """
+    Long-running local scan service over HTTP/JSON.
+
+    Per-symbol price frames, their detectors (with ATR cached), window
+    features and the classifier are loaded once and kept warm; CPU-bound
+    scans run in a thread pool so the event loop keeps answering.
+
+    Endpoints:
+        GET  /health
+        POST /scan      {"symbol", "since"?, "last_bars"?, "max_images"?, "thresholds"?, "valid_only"?}
+        POST /classify  {"patterns": [{<the model's feature columns>}, ...]}
+        GET  /patterns  ?symbol=&start=&end=&valid=   (pattern store lookup)
+    """
+
+    def __init__(self, data: OHLCVData, classifier=None, store_path: str = None, workers: int = 2):
+        self.data = data
+        self.classifier = classifier
+        self.store = PatternStore(store_path) if store_path else None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        self.server = None
+
+        # Warm state: per-symbol frames, detectors (ATR) and features computed once
+        self.frames = {}
+        self.detectors = {}
+        self.features = {}
+        for symbol in data.symbols:
+            self.frames[symbol] = data.symbol_frame(symbol)
+            self.detectors[symbol] = CupHandleDetector(self.frames[symbol])
+            self.features[symbol] = detector_features(self.detectors[symbol])
+
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/scan"): self.scan,
+            ("POST", "/classify"): self.classify,
+            ("GET", "/patterns"): self.patterns,
+        }
+
+    # ---------------------------
+    # Endpoints
+    # ---------------------------
+    async def health(self, params, body):
+        return {
+            "status": "ok",
+            "symbols": self.data.symbols,
+            "classifier": self.classifier is not None,
+            "store": self.store is not None,
+        }
+
+    async def scan(self, params, body):
+        symbol = body.get("symbol")
+        if symbol not in self.detectors:
+            raise HTTPError(404, f"Unknown symbol: {symbol}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._scan_sync, symbol, body)
+
+    def _scan_sync(self, symbol, body):
+        frame = self.frames[symbol]
+        detector = self.detectors[symbol]
+        if body.get("thresholds"):
+            warm = detector
+            detector = CupHandleDetector(frame, thresholds=body["thresholds"])
+            warm.window_stats()
+            detector._atr, detector._window_stats = warm.atr(), warm._window_stats
+
+        # Only windows whose breakout bar falls in the requested range
+        first_breakout = 0
+        if body.get("since") is not None:
+            since = pd.Timestamp(body["since"])
+            if since.tzinfo is not None:
+                since = since.tz_convert(None)
+            since = np.datetime64(since, "ns")
+            first_breakout = int(np.searchsorted(frame["timestamp"].values, since))
+        if body.get("last_bars") is not None:
+            first_breakout = max(first_breakout, len(frame) - int(body["last_bars"]))
+        start = max(first_breakout - CUP_BARS - HANDLE_BARS, 0)
+
+        patterns = detector.find_patterns(max_images=int(body.get("max_images", len(frame))), start=start)
+        if body.get("valid_only"):
+            patterns = [p for p in patterns if p["valid"]]
+        attach_features(patterns, self.features[symbol])
+
+        timestamps = frame["timestamp"]
+        for pat in patterns:
+            pat["cup_start_time"] = timestamps.iloc[pat["cup_start"]]
+            pat["breakout_time"] = timestamps.iloc[pat["breakout"]]
+        if self.classifier is not None:
+            for pat, (ml_valid, confidence) in zip(patterns, self.classifier.predict_many(patterns)):
+                pat["ml_valid"], pat["confidence"] = ml_valid, confidence
+        return {"symbol": symbol, "count": len(patterns), "patterns": patterns}
+
+    async def classify(self, params, body):
+        if self.classifier is None:
+            raise HTTPError(503, "No classifier loaded")
+        patterns = body.get("patterns")
+        if not isinstance(patterns, list):
+            raise HTTPError(400, "'patterns' must be a list")
+        loop = asyncio.get_running_loop()
+        predictions = await loop.run_in_executor(
+            self.executor, self.classifier.predict_many, patterns
+        )
+        return {"predictions": [{"ml_valid": v, "confidence": c} for v, c in predictions]}
+
+    async def patterns(self, params, body):
+        if self.store is None:
+            raise HTTPError(503, "No pattern store configured")
+        valid = params.get("valid")
+        if valid is not None:
+            valid = valid.lower() in ("1", "true", "yes")
+        loop = asyncio.get_running_loop()
+        frame = await loop.run_in_executor(self.executor, lambda: self.store.query(
+            symbol=params.get("symbol"), start=params.get("start"), end=params.get("end"), valid=valid
+        ))
+        # NULLs come back as NaN; object dtype lets them become None
+        frame = frame.astype(object).where(frame.notna(), None)
+        return {"count": len(frame), "patterns": frame.to_dict(orient="records")}
+
+    # ---------------------------
+    # HTTP plumbing
+    # ---------------------------
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", 0) or 0)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        raw = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, raw
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                status, payload, keep_alive = 200, None, False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, raw = request
+                    keep_alive = headers.get("connection", "").lower() == "keep-alive"
+
+                    url = urlsplit(target)
+                    handler = self.routes.get((method, url.path))
+                    if handler is None:
+                        raise HTTPError(404, f"No route for {method} {url.path}")
+                    params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                    try:
+                        body = json.loads(raw) if raw else {}
+                    except json.JSONDecodeError:
+                        raise HTTPError(400, "Body is not valid JSON")
+                    payload = await handler(params, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+                try:
+                    data = _encode(payload)
+                except (TypeError, ValueError) as e:
+                    status, data = 500, _encode({"error": f"Response not serializable: {e}"})
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        """Start listening; returns the bound (host, port)."""
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+        if self.store is not None:
+            self.store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Cup & Handle scan service")
+    parser.add_argument("--csv", type=str, default="data/raw_data.csv", help="OHLCV CSV to keep in memory")
+    parser.add_argument("--model", type=str, default=os.path.join("models", "cup_handle_model.pkl"))
+    parser.add_argument("--db", type=str, default=config.PATTERN_DB, help="Pattern store for /patterns")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    prepared, _ = prepare_ohlcv(pd.read_csv(args.csv), freq=config.BAR_FREQ, fill_gaps=config.FILL_GAPS)
+    data = OHLCVData.from_frame(prepared, float32_prices=config.FLOAT32_PRICES)
+    classifier = None
+    if os.path.exists(args.model):
+        from utils.pattern_classifier import PatternClassifier
+        classifier = PatternClassifier(args.model)
+        classifier.load()
+        print(f"✅ Loaded ML model from {args.model}")
+
+    async def serve():
+        service = ScanService(data, classifier=classifier, store_path=args.db)
+        host, port = await service.start(args.host, args.port)
+        print(f"🚀 Scan service listening on http://{host}:{port}")
+        try:
+            await service.server.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("Scan service stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# tests/test_backtest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from backtest import forward_outcomes, backtest_patterns, backtest_report, summarize_backtest
+from pattern_detector import CupHandleDetector
+
+
+# -----------------------
+# Fixture: Small hand-made price path
+# -----------------------
+@pytest.fixture
+def price_df():
+    close = np.array([100, 100, 101, 103, 99, 98, 104, 105], dtype=float)
+    return pd.DataFrame({
+        "close": close,
+        "high": close + 0.5,
+        "low": close - 0.5,
+    })
+
+
+# -----------------------
+# 1. Returns, excursions and hit times
+# -----------------------
+def test_forward_outcomes_values(price_df):
+    out = forward_outcomes(
+        price_df["close"], price_df["high"], price_df["low"],
+        breakout=np.array([1, 5]), horizons=(2, 4), target=0.03, stop=0.015,
+    )
+    # Pattern 0 enters at 100: closes 101, 103, 99, 98
+    assert out["ret_2"][0] == pytest.approx(0.03)
+    assert out["mfe_4"][0] == pytest.approx(0.035)
+    assert out["mae_4"][0] == pytest.approx(-0.025)
+    assert out["target_bars"][0] == 2
+    assert out["stop_bars"][0] == 3
+    assert out["outcome"][0] == "target"
+
+    # Pattern 1 enters at 98 with only 2 bars left
+    assert out["ret_2"][1] == pytest.approx(105 / 98 - 1)
+    assert np.isnan(out["ret_4"][1])
+    assert np.isnan(out["mfe_4"][1])
+    assert np.isnan(out["stop_bars"][1])
+
+
+# -----------------------
+# 2. Aggregation per symbol & invalid_reason
+# -----------------------
+def test_backtest_and_summary():
+    df = pd.read_csv("data/raw_data.csv")
+    df_symbol = df[df["symbol"] == "ETHUSDT"].reset_index(drop=True)
+    patterns = CupHandleDetector(df_symbol).find_patterns(max_images=200)
+
+    results = backtest_patterns(df_symbol, patterns, symbol="ETHUSDT")
+    assert len(results) == len(patterns)
+    assert {"ret_5", "mfe_60", "mae_15", "outcome"} <= set(results.columns)
+
+    summary = summarize_backtest(results)
+    assert summary["count"].sum() == len(patterns)
+    assert set(summary["invalid_reason"]) == {p["invalid_reason"] for p in patterns}
+
+
+# -----------------------
+# 3. Report rows backtested per symbol
+# -----------------------
+def test_backtest_report_matches_patterns():
+    df = pd.read_csv("data/raw_data.csv")
+    df_symbol = df[df["symbol"] == "BTCUSDT"].reset_index(drop=True)
+    patterns = CupHandleDetector(df_symbol).find_patterns(max_images=20)
+    report = pd.DataFrame(patterns).assign(symbol="BTCUSDT")
+
+    from_report = backtest_report(report, df)
+    direct = backtest_patterns(df_symbol, patterns, symbol="BTCUSDT")
+    np.testing.assert_allclose(from_report["ret_15"], direct["ret_15"])
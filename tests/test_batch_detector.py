@@ -0,0 +1,61 @@
+# tests/test_batch_detector.py
+
+import pandas as pd
+import pytest
+from batch_detector import batch_find_patterns, stack_symbols
+from data_prep import prepare_ohlcv
+from features import FEATURE_COLUMNS, detector_features, attach_features
+from ohlcv_data import OHLCVData
+from pattern_detector import CupHandleDetector, FLAG_BAD
+
+
+# -----------------------
+# Fixture: Real data (two time-aligned symbols)
+# -----------------------
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_csv("data/raw_data.csv")
+
+
+def assert_same_patterns(got, expected):
+    assert [p["cup_start"] for p in got] == [p["cup_start"] for p in expected]
+    for a, b in zip(got, expected):
+        for key in ("breakout", "valid", "invalid_reason"):
+            assert a[key] == b[key]
+        for key in ("cup_depth", "handle_depth", "r2"):
+            assert (a[key] is None) == (b[key] is None)
+            if a[key] is not None:
+                assert a[key] == pytest.approx(b[key])
+
+
+# -----------------------
+# 1. Aligned symbols: same patterns as one detector per symbol
+# -----------------------
+def test_batch_matches_per_symbol(raw_df):
+    data = OHLCVData.from_frame(raw_df)
+    results = batch_find_patterns(data, max_images=300, start=20)
+    assert set(results) == {"BTCUSDT", "ETHUSDT"}
+    for symbol in data.symbols:
+        expected = CupHandleDetector(data.symbol_frame(symbol)).find_patterns(max_images=300, start=20)
+        assert_same_patterns(results[symbol], expected)
+
+
+# -----------------------
+# 2. Misaligned symbols: missing bars are skipped, indices stay per symbol
+# -----------------------
+def test_batch_misaligned(raw_df):
+    eth = raw_df.index[(raw_df["symbol"] == "ETHUSDT").to_numpy()]
+    prepared, _ = prepare_ohlcv(raw_df.drop(index=eth[500:505]))
+    data = OHLCVData.from_frame(prepared)
+
+    stacked = stack_symbols(data)
+    assert stacked["close"].shape == (2, 2290)
+    assert (stacked["bar_flags"][1, 500:505] & FLAG_BAD).all()
+
+    results = batch_find_patterns(data, max_images=3000, features=True)
+    for symbol in data.symbols:
+        detector = CupHandleDetector(data.symbol_frame(symbol))
+        expected = attach_features(detector.find_patterns(max_images=3000), detector_features(detector))
+        assert_same_patterns(results[symbol], expected)
+        got = pd.DataFrame(results[symbol])[FEATURE_COLUMNS]
+        pd.testing.assert_frame_equal(got, pd.DataFrame(expected)[FEATURE_COLUMNS])
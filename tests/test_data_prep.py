@@ -0,0 +1,109 @@
+# tests/test_data_prep.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from data_prep import prepare_ohlcv
+from pattern_detector import CupHandleDetector, clean_window_mask, FLAG_GAP, FLAG_FILLED, FLAG_BAD
+
+
+# -----------------------
+# Fixture: Real data, and a messy copy of it
+# -----------------------
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_csv("data/raw_data.csv")
+
+
+@pytest.fixture
+def messy_df(raw_df):
+    df = raw_df.sample(frac=1, random_state=0)              # unsorted
+    df = pd.concat([df, df.iloc[:20]])                        # 20 duplicate bars
+    btc = df.index[(df["symbol"] == "BTCUSDT").to_numpy()]
+    df = df.drop(index=[i for i in range(100, 103) if i in btc])  # 3 missing minutes (one gap)
+    df.loc[df.index == 500, "close"] = np.nan                 # non-finite price
+    df.loc[df.index == 600, "high"] = 1.0                     # high below low
+    return df
+
+
+# -----------------------
+# 1. Sort, dedupe, flag gaps and bad bars
+# -----------------------
+def test_prepare_flags(messy_df):
+    prepared, summary = prepare_ohlcv(messy_df)
+    assert summary["duplicates"] == 20
+    assert summary["gaps"] == 1 and summary["bad"] == 2 and summary["filled"] == 0
+    assert not prepared[["open", "high", "low", "close"]].isna().any().any()
+
+    for _, bars in prepared.groupby("symbol"):
+        assert bars["timestamp"].is_monotonic_increasing and bars["timestamp"].is_unique
+    flags = prepared["bar_flags"].to_numpy()
+    assert ((flags & FLAG_GAP) != 0).sum() == 1
+    gap_bar = prepared[(flags & FLAG_GAP) != 0].iloc[0]
+    assert gap_bar["symbol"] == "BTCUSDT" and gap_bar["timestamp"] == pd.Timestamp("2024-01-01 01:43:00")
+
+
+def test_prepare_fill_gaps(messy_df):
+    prepared, summary = prepare_ohlcv(messy_df, freq="1min", fill_gaps=True)
+    assert summary["filled"] == 3
+    flags = prepared["bar_flags"].to_numpy()
+    assert ((flags & FLAG_GAP) != 0).sum() == 0
+    filled = prepared[(flags & FLAG_FILLED) != 0]
+    assert filled["timestamp"].dt.strftime("%H:%M").tolist() == ["01:40", "01:41", "01:42"]
+    assert (filled["volume"] == 0).all() and (filled["high"] == filled["close"]).all()
+    assert (prepared.groupby("symbol")["timestamp"].diff().dropna() == pd.Timedelta("1min")).all()
+
+
+# -----------------------
+# 2. Windows over gaps or bad bars are masked
+# -----------------------
+def test_clean_window_mask():
+    flags = np.zeros(100, dtype=np.uint8)
+    flags[60] = FLAG_GAP   # windows 18..59 contain bar 60 after their first bar
+    flags[5] = FLAG_BAD    # windows 0..5 contain bar 5
+    mask = clean_window_mask(flags)
+    assert len(mask) == 50
+    assert np.flatnonzero(~mask).tolist() == list(range(0, 6)) + list(range(18, 50))
+
+
+# -----------------------
+# 3. Fast path on prepared data matches the rule-by-rule detector
+# -----------------------
+def test_prepared_fast_path_matches(raw_df):
+    prepared, _ = prepare_ohlcv(raw_df)
+    btc = prepared[prepared["symbol"] == "BTCUSDT"].reset_index(drop=True)
+
+    fast = CupHandleDetector(btc).find_patterns(max_images=500, start=100)
+    slow = CupHandleDetector(btc.drop(columns="bar_flags")).find_patterns(max_images=500, start=100)
+    assert len(fast) == len(slow) == 500
+    for a, b in zip(fast, slow):
+        for key in ("cup_start", "breakout", "valid", "invalid_reason", "cup_duration", "handle_duration"):
+            assert a[key] == b[key]
+        assert a["cup_depth"] == pytest.approx(b["cup_depth"])
+        assert (a["handle_depth"] is None) == (b["handle_depth"] is None)
+        assert (a["r2"] is None) == (b["r2"] is None)
+        if a["r2"] is not None:
+            assert a["r2"] == pytest.approx(b["r2"])
+
+
+def test_prepared_skips_gap_windows(messy_df):
+    prepared, _ = prepare_ohlcv(messy_df)
+    btc = prepared[prepared["symbol"] == "BTCUSDT"].reset_index(drop=True)
+    starts = [p["cup_start"] for p in CupHandleDetector(btc).find_patterns(max_images=len(btc))]
+    gap_at = int(np.flatnonzero(btc["bar_flags"].to_numpy() & FLAG_GAP)[0])
+    assert not any(s < gap_at <= s + 42 for s in starts)
+
+
+def test_prepared_reuses_window_stats(raw_df):
+    prepared, _ = prepare_ohlcv(raw_df)
+    btc = prepared[prepared["symbol"] == "BTCUSDT"].reset_index(drop=True)
+    detector = CupHandleDetector(btc)
+
+    tail = detector.find_patterns(max_images=len(btc), start=len(btc) - 400)
+    assert detector._window_stats[0] == len(btc) - 400  # tail scan computes only tail windows
+    full = detector.find_patterns(max_images=len(btc))
+    stats = detector.window_stats(len(btc) - 400)
+    assert np.shares_memory(stats["r2"], detector.window_stats()["r2"])  # computed once, then sliced
+    assert stats["cup_start"][0] == len(btc) - 400
+    assert [p["cup_start"] for p in tail] == [p["cup_start"] for p in full if p["cup_start"] >= len(btc) - 400]
+    assert CupHandleDetector(btc).find_patterns(start=len(btc)) == []
@@ -0,0 +1,89 @@
+# tests/test_detector_engine.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import detector_engine
+from detector_engine import DetectionEngine, PatternDefinition, register_pattern, RESULT_COLUMNS
+from pattern_detector import CupHandleDetector
+
+
+# -----------------------
+# Fixture: One symbol of real data
+# -----------------------
+@pytest.fixture(scope="module")
+def btc_df():
+    df = pd.read_csv("data/raw_data.csv")
+    return df[df["symbol"] == "BTCUSDT"].reset_index(drop=True).iloc[:1500]
+
+
+# -----------------------
+# 1. Cup & handle matches CupHandleDetector
+# -----------------------
+def test_cup_handle_matches_detector(btc_df):
+    results = DetectionEngine(btc_df, symbol="BTCUSDT").run(patterns=["cup_handle"])
+    expected = CupHandleDetector(btc_df).find_patterns(max_images=len(btc_df))
+
+    assert list(results.columns[:len(RESULT_COLUMNS) + 1]) == ["symbol"] + RESULT_COLUMNS
+    assert results["start"].tolist() == [p["cup_start"] for p in expected]
+    assert results["breakout"].tolist() == [p["breakout"] for p in expected]
+    assert results["valid"].tolist() == [p["valid"] for p in expected]
+    assert results["invalid_reason"].tolist() == [p["invalid_reason"] for p in expected]
+
+
+# -----------------------
+# 2. Shared statistics are computed once per series
+# -----------------------
+def test_statistics_computed_once(btc_df, monkeypatch):
+    calls = []
+    atr = detector_engine.STATISTICS["atr"]
+    monkeypatch.setitem(detector_engine.STATISTICS, "atr", lambda engine: calls.append(1) or atr(engine))
+
+    engine = DetectionEngine(btc_df)
+    results = engine.run()
+    engine.run(patterns=["double_bottom"])
+    assert len(calls) == 1
+    assert set(results["pattern"]) == {"cup_handle", "double_bottom"}
+
+
+# -----------------------
+# 3. New pattern types plug into the same pass
+# -----------------------
+def test_register_pattern(btc_df, monkeypatch):
+    monkeypatch.setattr(detector_engine, "PATTERNS", dict(detector_engine.PATTERNS))
+
+    class WideBreakout(PatternDefinition):
+        name = "wide_breakout"
+        requires = ("cup_handle_windows",)
+        thresholds = {"min_atr": 3.0}
+
+        def evaluate(self, stats, thresholds):
+            w = stats["cup_handle_windows"]
+            valid = w["breakout_atr"] >= thresholds["min_atr"]
+            return {"start": w["cup_start"], "end": w["cup_start"] + 41, "breakout": w["cup_start"] + 42,
+                    "valid": valid, "invalid_reason": np.where(valid, "", "Narrow")}
+
+    register_pattern(WideBreakout())
+    results = DetectionEngine(btc_df).run(thresholds={"wide_breakout": {"min_atr": 1e9}})
+    assert not results.loc[results["pattern"] == "wide_breakout", "valid"].any()
+
+    class Broken(PatternDefinition):
+        name = "broken"
+        requires = ("no_such_statistic",)
+
+    with pytest.raises(ValueError):
+        register_pattern(Broken())
+
+
+# -----------------------
+# 4. Double bottom on a hand-made W
+# -----------------------
+def test_double_bottom_detected():
+    close = np.concatenate([
+        np.linspace(110, 100, 10), np.linspace(100, 106, 10),
+        np.linspace(106, 100, 10), np.linspace(100, 105, 10), [112.0],
+    ])
+    df = pd.DataFrame({"open": close, "high": close + 0.2, "low": close - 0.2, "close": close})
+    results = DetectionEngine(df).run(patterns=["double_bottom"], valid_only=True)
+    assert results["start"].tolist() == [0]
+    assert results["breakout"].tolist() == [40]
@@ -0,0 +1,89 @@
+# tests/test_features.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+import joblib
+from pattern_detector import CupHandleDetector
+from features import (
+    FEATURE_COLUMNS, FEATURE_VERSION, LEGACY_FEATURES,
+    compute_features, detector_features, attach_features, feature_set, feature_matrix,
+)
+from utils.pattern_classifier import PatternClassifier
+
+
+# -----------------------
+# Fixture: One symbol of real data
+# -----------------------
+@pytest.fixture(scope="module")
+def btc_df():
+    df = pd.read_csv("data/raw_data.csv")
+    return df[df["symbol"] == "BTCUSDT"].reset_index(drop=True).iloc[:1500]
+
+
+# -----------------------
+# 1. One value per scanned window, consistent with the detector
+# -----------------------
+def test_features_match_detector(btc_df):
+    detector = CupHandleDetector(btc_df)
+    features = detector_features(detector)
+    assert list(features) == FEATURE_COLUMNS
+    assert all(len(v) == len(btc_df) - 50 for v in features.values())
+
+    same = compute_features(btc_df["high"], btc_df["low"], btc_df["close"],
+                            volume=btc_df["volume"], atr=detector.atr())
+    for col in FEATURE_COLUMNS:
+        np.testing.assert_array_equal(same[col], features[col])
+
+    patterns = attach_features(detector.find_patterns(max_images=200), features)
+    for pat in patterns:
+        assert pat["cup_depth"] == pytest.approx(features["cup_depth"][pat["cup_start"]])
+        # Detector keys keep the detector's values (ints for durations)
+        assert type(pat["cup_duration"]) is int and type(pat["handle_duration"]) is int
+        # R² is a feature even where the rules stopped before computing it
+        assert not np.isnan(pat["cup_r2"])
+        if pat["r2"] is not None:
+            assert pat["cup_r2"] == pytest.approx(pat["r2"])
+
+
+# -----------------------
+# 2. Feature set selection and missing values
+# -----------------------
+def test_feature_set_and_matrix():
+    assert feature_set(FEATURE_COLUMNS + ["valid"]) == (FEATURE_COLUMNS, FEATURE_VERSION)
+    assert feature_set(LEGACY_FEATURES) == (LEGACY_FEATURES, 1)
+    with pytest.raises(ValueError):
+        feature_set(["cup_depth"])
+
+    rows = [{"cup_depth": 2.0, "r2": None}]
+    assert np.isnan(feature_matrix(rows, ["cup_depth", "r2"])[0, 1])
+    assert feature_matrix(rows, ["cup_depth", "r2"], version=1)[0].tolist() == [2.0, 0.0]
+
+
+# -----------------------
+# 3. Models record their feature set; legacy models keep working
+# -----------------------
+def test_classifier_feature_versions(btc_df, tmp_path):
+    detector = CupHandleDetector(btc_df)
+    report = pd.DataFrame(attach_features(detector.find_patterns(max_images=2000), detector_features(detector)))
+    report["valid"] = report["cup_r2"] > report["cup_r2"].median()
+
+    clf = PatternClassifier(model_path=str(tmp_path / "model.pkl"))
+    clf.train(report)
+    loaded = PatternClassifier(model_path=clf.model_path)
+    loaded.load()
+    assert loaded.model.feature_version_ == FEATURE_VERSION
+    assert loaded.model.feature_names_ == FEATURE_COLUMNS
+    ok, conf = loaded.predict({**report.iloc[0].to_dict(), "volume_ratio": np.nan})
+    assert isinstance(ok, bool) and 0.5 <= conf <= 1.0
+    rows = report.iloc[:50].to_dict(orient="records")
+    assert loaded.predict_many(rows) == [loaded.predict(row) for row in rows]
+    assert loaded.predict_many([]) == []
+
+    # A model saved before versioning: plain forest on the legacy five columns
+    legacy = RandomForestClassifier(n_estimators=5, random_state=0)
+    legacy.fit(report[LEGACY_FEATURES].fillna(0).values, report["valid"].astype(int))
+    joblib.dump(legacy, tmp_path / "legacy.pkl")
+    old = PatternClassifier(model_path=str(tmp_path / "legacy.pkl"))
+    assert isinstance(old.predict(report.iloc[0].to_dict())[0], bool)
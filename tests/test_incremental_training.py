@@ -0,0 +1,101 @@
+# tests/test_incremental_training.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.pattern_classifier import (
+    PatternClassifier, ReservoirSampler, iter_report_batches,
+)
+from features import LEGACY_FEATURES, FEATURE_COLUMNS, FEATURE_VERSION
+
+
+# -----------------------
+# Fixture: Synthetic report.csv (separable, imbalanced)
+# -----------------------
+@pytest.fixture
+def report_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1000
+    valid = rng.random(n) < 0.15
+    df = pd.DataFrame({
+        "symbol": "SYN",
+        "cup_depth": np.where(valid, 5.0, 1.0) + rng.normal(0, 0.3, n),
+        "cup_duration": 30,
+        "handle_depth": np.where(valid, 1.0, 2.0) + rng.normal(0, 0.3, n),
+        "handle_duration": 10,
+        "r2": np.where(rng.random(n) < 0.1, np.nan, rng.random(n)),
+        "valid": valid,
+    })
+    path = tmp_path / "report.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+# -----------------------
+# 1. Reservoir stays bounded and uniform-ish
+# -----------------------
+def test_reservoir_bounded():
+    sampler = ReservoirSampler(size=100, n_features=1, random_state=0)
+    for start in range(0, 10_000, 1000):
+        sampler.add(np.arange(start, start + 1000, dtype=float)[:, None])
+    assert sampler.count == 100
+    assert sampler.seen == 10_000
+    # Later rows are not favoured: roughly half the sample from each half of the stream
+    assert 25 < (sampler.rows[:, 0] < 5000).sum() < 75
+    assert sampler.sample(150).shape == (150, 1)
+
+
+# -----------------------
+# 2. Batches stream the report
+# -----------------------
+def test_iter_report_batches(report_csv):
+    batches = list(iter_report_batches(report_csv, chunksize=300))
+    assert [len(y) for _, y in batches] == [300, 300, 300, 100]
+    assert all(list(X.columns) == LEGACY_FEATURES for X, _ in batches)
+    assert sum(int(y.sum()) for _, y in batches) == int(pd.read_csv(report_csv)["valid"].sum())
+
+
+def test_iter_report_batches_rejects_mixed_feature_sets(report_csv, tmp_path):
+    partial = tmp_path / "partial.csv"
+    pd.read_csv(report_csv).drop(columns=["r2"]).to_csv(partial, index=False)
+    with pytest.raises(ValueError, match="partial.csv"):
+        next(iter_report_batches([report_csv, str(partial)]))
+
+    newer = tmp_path / "newer.csv"
+    df = pd.read_csv(report_csv)
+    for col in FEATURE_COLUMNS:
+        df[col] = df.get(col, 1.0)
+    df.to_csv(newer, index=False)
+    with pytest.raises(ValueError, match=f"feature set v{FEATURE_VERSION}"):
+        next(iter_report_batches([report_csv, str(newer)]))
+
+
+# -----------------------
+# 3. Incremental training grows one forest and stays loadable
+# -----------------------
+def test_train_incremental(report_csv, tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    clf = PatternClassifier(model_path=model_path)
+    clf.train_incremental(iter_report_batches(report_csv, chunksize=250), trees_per_batch=5, reservoir_size=50)
+    assert clf.model.n_estimators == 20
+
+    loaded = PatternClassifier(model_path=model_path)
+    loaded.load()
+    ok, conf = loaded.predict({"cup_depth": 5.0, "cup_duration": 30, "handle_depth": 1.0,
+                               "handle_duration": 10, "r2": 0.5})
+    assert ok is True and 0.5 <= conf <= 1.0
+    ok, _ = loaded.predict({"cup_depth": 1.0, "cup_duration": 30, "handle_depth": 2.0,
+                            "handle_duration": 10, "r2": 0.5})
+    assert ok is False
+
+    # Resume adds trees to the saved forest
+    clf = PatternClassifier(model_path=model_path)
+    clf.train_incremental(iter_report_batches(report_csv, chunksize=500), trees_per_batch=5, resume=True)
+    assert clf.model.n_estimators == 30
+
+
+def test_train_incremental_single_class(tmp_path):
+    batches = [(pd.DataFrame(np.ones((10, 5)), columns=LEGACY_FEATURES), np.zeros(10, dtype=int))]
+    clf = PatternClassifier(model_path=str(tmp_path / "model.pkl"))
+    with pytest.raises(ValueError):
+        clf.train_incremental(batches)
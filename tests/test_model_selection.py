@@ -0,0 +1,91 @@
+# tests/test_model_selection.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from utils.model_selection import purged_walk_forward_splits, tune_classifier
+from utils.pattern_classifier import PatternClassifier
+
+
+# -----------------------
+# Fixture: Report with overlapping windows over time
+# -----------------------
+@pytest.fixture
+def report_df():
+    rng = np.random.default_rng(1)
+    n = 300
+    start = pd.date_range("2024-01-01", periods=n, freq="5min")
+    valid = rng.random(n) < 0.3
+    return pd.DataFrame({
+        "symbol": "SYN",
+        "cup_start": np.arange(n) * 5,
+        "breakout": np.arange(n) * 5 + 42,
+        "cup_start_time": start,
+        "breakout_time": start + pd.Timedelta(minutes=42),
+        "cup_depth": np.where(valid, 5.0, 1.0) + rng.normal(0, 0.5, n),
+        "cup_duration": 30,
+        "handle_depth": rng.random(n),
+        "handle_duration": 10,
+        "r2": rng.random(n),
+        "valid": valid,
+    })
+
+
+# -----------------------
+# 1. Splits are walk-forward and purged
+# -----------------------
+def test_purged_walk_forward_splits(report_df):
+    splits = list(purged_walk_forward_splits(report_df, n_splits=4))
+    assert len(splits) == 4
+    start = report_df["cup_start_time"].values
+    end = report_df["breakout_time"].values
+    tested = np.concatenate([test for _, test in splits])
+    assert len(tested) == len(np.unique(tested))
+    for train, test in splits:
+        # Every training window ends before the first test pattern starts
+        assert end[train].max() < start[test].min()
+    # Patterns whose window reaches into the test block are purged (42-min windows, 5-min spacing)
+    train, test = splits[0]
+    assert test.min() - train.max() - 1 == 8
+
+
+def test_splits_fall_back_to_bar_index(report_df):
+    df = report_df.drop(columns=["cup_start_time", "breakout_time"])
+    for (train_a, test_a), (train_b, test_b) in zip(
+        purged_walk_forward_splits(df, 3), purged_walk_forward_splits(report_df, 3)
+    ):
+        np.testing.assert_array_equal(train_a, train_b)
+        np.testing.assert_array_equal(test_a, test_b)
+
+
+def test_bar_index_fallback_needs_one_symbol(report_df):
+    df = report_df.drop(columns=["cup_start_time", "breakout_time"])
+    df.loc[df.index % 2 == 0, "symbol"] = "OTHER"
+    with pytest.raises(ValueError, match="not comparable across symbols"):
+        list(purged_walk_forward_splits(df, 3))
+
+
+# -----------------------
+# 2. Tuning reports per-fold metrics and saves a loadable model
+# -----------------------
+def test_tune_classifier(report_df, tmp_path):
+    model_path = str(tmp_path / "model.pkl")
+    grid = {"n_estimators": [10, 20], "max_depth": [None, 3]}
+    results, best = tune_classifier(report_df, param_grid=grid, n_splits=3, n_jobs=1, model_path=model_path)
+
+    assert len(results) == 4 * 3
+    assert {"fold", "fit_time", "roc_auc", "balanced_accuracy", "n_train", "n_test"} <= set(results.columns)
+    assert best in [dict(p) for p in results["params"]]
+
+    clf = PatternClassifier(model_path=model_path)
+    clf.load()
+    assert clf.model.n_estimators == best["n_estimators"]
+    ok, _ = clf.predict({"cup_depth": 5.0, "cup_duration": 30, "handle_depth": 0.5,
+                         "handle_duration": 10, "r2": 0.5})
+    assert ok is True
+
+
+def test_tune_rejects_unknown_scoring(report_df, tmp_path):
+    with pytest.raises(ValueError, match="Unknown scoring"):
+        tune_classifier(report_df, scoring="accuracy", n_jobs=1, model_path=str(tmp_path / "model.pkl"))
+    assert not (tmp_path / "model.pkl").exists()
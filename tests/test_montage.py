@@ -0,0 +1,47 @@
+# tests/test_montage.py
+
+import os
+import json
+import numpy as np
+import pandas as pd
+from PIL import Image
+from plot_utils import save_pattern_montage
+
+
+def make_items(n):
+    items = []
+    for i in range(n):
+        close = np.cos(np.linspace(0, np.pi * 2, 42)) + i
+        df = pd.DataFrame({"timestamp": pd.date_range("2024-01-01", periods=42, freq="min"), "close": close})
+        items.append((100 + i, "BTCUSDT", {"df": df, "valid": i % 2 == 0}))
+    return items
+
+
+# -----------------------
+# 1. One PNG with a tile per pattern + JSON index
+# -----------------------
+def test_montage_grid_and_index(tmp_path):
+    path = os.path.join(tmp_path, "montage.png")
+    index = save_pattern_montage(make_items(23), path, ncols=5, tile_size=(2.0, 1.5), dpi=50)
+
+    assert os.path.exists(path)
+    with Image.open(path) as img:
+        assert img.size == (5 * 100, 5 * 75)  # 23 tiles → 5 × 5 grid
+
+    assert len(index) == 23
+    assert index[100] == {"symbol": "BTCUSDT", "row": 0, "col": 0, "bbox": [0, 0, 100, 75]}
+    assert index[122]["row"] == 4 and index[122]["col"] == 2
+
+    with open(os.path.join(tmp_path, "montage.json")) as f:
+        assert json.load(f)["122"] == index[122]
+
+
+# -----------------------
+# 2. Flat series and single pattern
+# -----------------------
+def test_montage_single_flat_pattern(tmp_path):
+    df = pd.DataFrame({"close": [5.0] * 10})
+    path = os.path.join(tmp_path, "one.png")
+    index = save_pattern_montage([(0, "ETHUSDT", {"df": df})], path, labels=False)
+    assert index[0]["row"] == 0 and index[0]["col"] == 0
+    assert os.path.exists(path)
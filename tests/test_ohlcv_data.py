@@ -0,0 +1,85 @@
+# tests/test_ohlcv_data.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from ohlcv_data import OHLCVData, MemoryBudget
+from pattern_detector import CupHandleDetector
+
+
+# -----------------------
+# Fixture: Raw CSV as loaded before / compact layout
+# -----------------------
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_csv("data/raw_data.csv", parse_dates=["timestamp"])
+
+
+@pytest.fixture(scope="module")
+def data():
+    return OHLCVData.read_csv("data/raw_data.csv")
+
+
+# -----------------------
+# 1. Per-symbol frames match the old filtering and are views
+# -----------------------
+def test_symbol_frame_matches_raw(raw_df, data):
+    for symbol in ["BTCUSDT", "ETHUSDT"]:
+        expected = raw_df[raw_df["symbol"] == symbol].reset_index(drop=True)
+        frame = data.symbol_frame(symbol)
+        pd.testing.assert_frame_equal(
+            frame[["timestamp", "open", "high", "low", "close"]],
+            expected[["timestamp", "open", "high", "low", "close"]],
+            check_dtype=False,
+        )
+        np.testing.assert_array_equal(frame["volume"], expected["volume"])
+        assert np.shares_memory(frame["close"].values, data.columns["close"])
+
+
+# -----------------------
+# 2. Compact layout is smaller than the raw frame
+# -----------------------
+def test_compact_footprint(raw_df, data):
+    raw_bytes = raw_df.memory_usage(deep=True).sum()
+    assert data.nbytes < raw_bytes / 2
+    assert data.columns["timestamp"].dtype == np.int64
+    assert data.columns["volume"].itemsize < 8
+
+
+# -----------------------
+# 3. float32 prices only within tolerance
+# -----------------------
+def test_float32_prices():
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2024-01-01", periods=3, freq="min"),
+        "open": [1.5, 2.25, 3.0],
+        "high": [50000.123456789, 2.0, 3.0],
+        "low": [1.0, 2.0, 3.0],
+        "close": [1.0, 2.0, 3.0],
+        "symbol": ["X", "X", "X"],
+    })
+    data = OHLCVData.from_frame(df, float32_prices=True, price_tolerance=1e-9)
+    assert data.columns["open"].dtype == np.float32
+    assert data.columns["high"].dtype == np.float64
+
+
+# -----------------------
+# 4. Detector used without copying; same patterns as before
+# -----------------------
+def test_detector_on_compact_frame(raw_df, data):
+    frame = data.symbol_frame("ETHUSDT")
+    detector = CupHandleDetector(frame)
+    assert detector.df is frame
+
+    expected = CupHandleDetector(raw_df[raw_df["symbol"] == "ETHUSDT"]).find_patterns(max_images=50)
+    assert detector.find_patterns(max_images=50) == expected
+
+
+# -----------------------
+# 5. Memory budget report
+# -----------------------
+def test_memory_budget(data, capsys):
+    memory = MemoryBudget(budget_mb=0.001)
+    memory.record("load", data)
+    assert "exceeds memory budget" in capsys.readouterr().out
+    assert list(memory.summary()["stage"]) == ["load"]
@@ -0,0 +1,107 @@
+# tests/test_pattern_index.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from pattern_detector import CupHandleDetector
+from pattern_index import PatternIndex, shape_vectors
+
+
+# -----------------------
+# Fixture: Detector output for one symbol
+# -----------------------
+@pytest.fixture(scope="module")
+def eth_patterns():
+    df = pd.read_csv("data/raw_data.csv")
+    df_symbol = df[df["symbol"] == "ETHUSDT"].reset_index(drop=True)
+    return df_symbol, CupHandleDetector(df_symbol).find_patterns(max_images=100)
+
+
+# -----------------------
+# 1. Shape vectors are fixed-length and normalised
+# -----------------------
+def test_shape_vectors_normalised():
+    close = np.arange(100, dtype=float)
+    vectors = shape_vectors(close, [0, 10], [40, 90], length=16)
+    assert vectors.shape == (2, 16)
+    np.testing.assert_allclose(vectors.mean(axis=1), 0, atol=1e-6)
+    # A straight line resamples to the same shape regardless of span / level
+    np.testing.assert_allclose(vectors[0], vectors[1], atol=1e-5)
+
+
+# -----------------------
+# 2. Nearest neighbour of a stored pattern is itself
+# -----------------------
+def test_query_returns_self(eth_patterns, tmp_path):
+    df_symbol, patterns = eth_patterns
+    index = PatternIndex(str(tmp_path / "index"))
+    index.add_patterns(df_symbol, patterns, "ETHUSDT")
+
+    pat = patterns[7]
+    result = index.similar(df_symbol["close"].values, pat["cup_start"], pat["handle_end"], k=5)
+    assert len(result) == 5
+    assert result.loc[0, "cup_start"] == pat["cup_start"]
+    assert result.loc[0, "distance"] == pytest.approx(0, abs=1e-3)
+    assert result["distance"].is_monotonic_increasing
+
+
+# -----------------------
+# 3. Blocked search equals a single block
+# -----------------------
+def test_blocked_query_matches_full_scan(tmp_path):
+    rng = np.random.default_rng(0)
+    index = PatternIndex(str(tmp_path / "index"), length=8)
+    index.add(rng.standard_normal((1000, 8)))
+    queries = rng.standard_normal((3, 8))
+
+    d_full, i_full = index.query(queries, k=10, block_size=5000)
+    d_block, i_block = index.query(queries, k=10, block_size=64)
+    np.testing.assert_array_equal(i_full, i_block)
+    np.testing.assert_allclose(d_full, d_block, rtol=1e-5)
+
+
+# -----------------------
+# 4. Incremental save / load
+# -----------------------
+def test_incremental_persistence(eth_patterns, tmp_path):
+    df_symbol, patterns = eth_patterns
+    path = str(tmp_path / "index")
+
+    index = PatternIndex(path, compact_rows=0)
+    index.add_patterns(df_symbol, patterns[:50], "ETHUSDT")
+    index.save()
+    index.add_patterns(df_symbol, patterns[50:], "ETHUSDT")
+    index.save()
+    assert len(list((tmp_path / "index").glob("chunk_*.npy"))) == 2
+
+    reloaded = PatternIndex.load(path, compact_rows=0)
+    assert len(reloaded) == len(patterns)
+    reloaded.add_patterns(df_symbol, patterns[:1], "ETHUSDT")
+    reloaded.save()
+    assert len(list((tmp_path / "index").glob("chunk_*.npy"))) == 3
+
+
+def test_chunks_ordered_and_compacted(eth_patterns, tmp_path):
+    df_symbol, patterns = eth_patterns
+    path = tmp_path / "index"
+
+    # Chunk numbers past 99999 still load in numeric order
+    index = PatternIndex(str(path), compact_rows=0)
+    index.add_patterns(df_symbol, patterns[:10], "ETHUSDT")
+    index.add_patterns(df_symbol, patterns[10:20], "ETHUSDT")
+    index.save()
+    for old, new in (("00000", "99999"), ("00001", "100000")):
+        for ext in (".npy", ".csv"):
+            (path / f"chunk_{old}{ext}").rename(path / f"chunk_{new}{ext}")
+    reloaded = PatternIndex.load(str(path))
+    reloaded._ensure_matrix()
+    assert list(reloaded._meta_all["cup_start"]) == [p["cup_start"] for p in patterns[:20]]
+
+    # Small chunks are merged on save, so repeated small updates keep one chunk
+    for lo in range(20, len(patterns), 10):
+        reloaded.add_patterns(df_symbol, patterns[lo:lo + 10], "ETHUSDT")
+        reloaded.save()
+    assert [f.name for f in path.glob("chunk_*.npy")] == ["chunk_99999.npy"]
+    final = PatternIndex.load(str(path))
+    final._ensure_matrix()
+    assert list(final._meta_all["cup_start"]) == [p["cup_start"] for p in patterns]
@@ -0,0 +1,99 @@
+# tests/test_pattern_store.py
+
+import pandas as pd
+import pytest
+from pattern_store import PatternStore
+
+
+def make_rows(symbol, starts, valid=True):
+    base = pd.Timestamp("2024-01-01")
+    return [{
+        "symbol": symbol,
+        "cup_start_time": base + pd.Timedelta(minutes=s),
+        "breakout_time": base + pd.Timedelta(minutes=s + 42),
+        "cup_start": s,
+        "breakout": s + 42,
+        "cup_depth": 10.0,
+        "valid": valid,
+        "invalid_reason": "" if valid else "Handle retrace too deep",
+        "r2": None,
+        "ml_valid": None,
+    } for s in starts]
+
+
+# -----------------------
+# Fixture: Store in a temp folder
+# -----------------------
+@pytest.fixture
+def store(tmp_path):
+    with PatternStore(str(tmp_path / "patterns.db")) as s:
+        yield s
+
+
+# -----------------------
+# 1. Upserts are idempotent
+# -----------------------
+def test_upsert_idempotent(store):
+    assert store.upsert(make_rows("BTCUSDT", [0, 1, 2])) == 3
+    assert store.upsert(make_rows("BTCUSDT", [0, 1, 2])) == 0
+    assert store.upsert(make_rows("BTCUSDT", [2, 3])) == 1
+    assert len(store) == 4
+
+
+# -----------------------
+# 2. Upsert updates existing rows
+# -----------------------
+def test_upsert_updates(store):
+    store.upsert(make_rows("ETHUSDT", [5], valid=False))
+    store.upsert(make_rows("ETHUSDT", [5], valid=True))
+    result = store.query(symbol="ETHUSDT")
+    assert len(result) == 1
+    assert result.loc[0, "valid"] == True  # noqa: E712
+
+
+# -----------------------
+# 3. Filtered queries
+# -----------------------
+def test_query_filters(store):
+    store.upsert(make_rows("BTCUSDT", [0, 10, 20], valid=True))
+    store.upsert(make_rows("BTCUSDT", [30], valid=False))
+    store.upsert(make_rows("ETHUSDT", [0, 10], valid=True))
+
+    valid_btc = store.query(symbol="BTCUSDT", valid=True)
+    assert list(valid_btc["cup_start"]) == [0, 10, 20]
+
+    window = store.query(start="2024-01-01 00:05", end="2024-01-01 00:25")
+    assert list(window["symbol"]) == ["BTCUSDT", "BTCUSDT", "ETHUSDT"]
+    assert pd.api.types.is_datetime64_any_dtype(window["cup_start_time"])
+
+    arrays = store.query_arrays(symbol=["ETHUSDT"], columns=["cup_start", "valid"])
+    assert list(arrays["cup_start"]) == [0, 10]
+
+
+# -----------------------
+# 4. Key columns required
+# -----------------------
+def test_upsert_requires_keys(store):
+    with pytest.raises(ValueError):
+        store.upsert([{"symbol": "BTCUSDT", "cup_start": 0}])
+
+
+def test_query_rejects_unknown_columns(store):
+    with pytest.raises(ValueError, match="Unknown columns"):
+        store.query(columns=["symbol; DROP TABLE patterns"])
+
+
+# -----------------------
+# 5. Tz-aware timestamps are stored as UTC
+# -----------------------
+def test_tz_aware_timestamps(store):
+    rows = make_rows("BTCUSDT", [0, 10])
+    for row in rows:
+        row["cup_start_time"] = row["cup_start_time"].tz_localize("UTC").tz_convert("Europe/Paris")
+        row["breakout_time"] = row["breakout_time"].isoformat() + "+00:00"
+    assert store.upsert(rows) == 2
+    assert store.upsert(make_rows("BTCUSDT", [0, 10])) == 0  # same UTC instants
+
+    result = store.query(start="2024-01-01T01:05:00+01:00")
+    assert list(result["cup_start"]) == [10]
+    assert result["cup_start_time"].iloc[0] == pd.Timestamp("2024-01-01 00:10")
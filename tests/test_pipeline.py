@@ -0,0 +1,106 @@
+# tests/test_pipeline.py
+
+import time
+import random
+import threading
+import pytest
+from pipeline import run_pipeline
+
+
+def square(symbol, task):
+    return task * task
+
+
+def make_detections(n_symbols=3, n_tasks=20):
+    return [(f"SYM{s}", list(range(n_tasks))) for s in range(n_symbols)]
+
+
+# -----------------------
+# 1. Output order matches the sequential path
+# -----------------------
+def test_pipeline_preserves_order():
+    def slow_square(symbol, task):
+        time.sleep(random.uniform(0, 0.005))
+        return task * task
+
+    written, done = [], []
+    run_pipeline(
+        make_detections(), slow_square,
+        on_rendered=lambda sym, task, result: written.append((sym, task, result)),
+        on_symbol_done=lambda sym: done.append((sym, len(written))),
+        render_workers=4, queue_size=5,
+    )
+    sequential = [(sym, t, t * t) for sym, tasks in make_detections() for t in tasks]
+    assert written == sequential
+    assert done == [("SYM0", 20), ("SYM1", 40), ("SYM2", 60)]
+
+
+# -----------------------
+# 2. Bounded queue applies backpressure to detection
+# -----------------------
+def test_pipeline_backpressure():
+    lock = threading.Lock()
+    state = {"submitted": 0, "written": 0, "max_in_flight": 0}
+
+    def detections():
+        for sym, tasks in make_detections(n_symbols=1, n_tasks=50):
+            for t in tasks:
+                with lock:
+                    state["submitted"] += 1
+                    in_flight = state["submitted"] - state["written"]
+                    state["max_in_flight"] = max(state["max_in_flight"], in_flight)
+                yield sym, [t]
+
+    def slow_write(sym, task, result):
+        time.sleep(0.002)
+        with lock:
+            state["written"] += 1
+
+    run_pipeline(detections(), square, slow_write, render_workers=2, queue_size=4)
+    assert state["written"] == 50
+    # queue (4 tasks + 4 symbol markers) + one item held by the writer + one being produced
+    assert state["max_in_flight"] <= 10
+
+
+# -----------------------
+# 3. Errors in any stage stop the pipeline and propagate
+# -----------------------
+def test_pipeline_render_error():
+    def failing(symbol, task):
+        if task == 7:
+            raise RuntimeError("render failed")
+        return task
+
+    written = []
+    with pytest.raises(RuntimeError, match="render failed"):
+        run_pipeline(make_detections(), failing, lambda s, t, r: written.append(t), queue_size=3)
+    assert written == list(range(7))
+
+
+def test_pipeline_detection_error():
+    def detections():
+        yield "SYM0", [1, 2]
+        raise ValueError("bad data")
+
+    with pytest.raises(ValueError, match="bad data"):
+        run_pipeline(detections(), square, lambda s, t, r: None)
+
+
+def test_pipeline_writer_error():
+    def failing_write(symbol, task, result):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError, match="disk full"):
+        run_pipeline(make_detections(n_tasks=200), square, failing_write, queue_size=2)
+
+
+# -----------------------
+# 4. Process executor gives the same output
+# -----------------------
+def test_pipeline_process_executor():
+    written = []
+    run_pipeline(
+        make_detections(n_symbols=1, n_tasks=10), square,
+        lambda s, t, r: written.append(r), render_workers=2, executor="process",
+    )
+    assert written == [t * t for t in range(10)]
@@ -0,0 +1,128 @@
+# tests/test_result_cache.py
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+from pattern_detector import CupHandleDetector, compute_window_stats, MIN_BARS
+from result_cache import ResultCache
+from ohlcv_data import OHLCVData
+from batch_detector import batch_find_patterns
+from features import detector_features, attach_features
+
+
+# -----------------------
+# Fixture: One symbol of real data
+# -----------------------
+@pytest.fixture(scope="module")
+def btc_df():
+    df = pd.read_csv("data/raw_data.csv")
+    return df[df["symbol"] == "BTCUSDT"].reset_index(drop=True)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResultCache(str(tmp_path / "cache"))
+
+
+def fake_classifier(tmp_path):
+    model_file = tmp_path / "model.pkl"
+    model_file.write_bytes(b"model-v1")
+    clf = MagicMock()
+    clf.model_path = str(model_file)
+    clf.predict_many.side_effect = lambda patterns: [(True, 0.9)] * len(patterns)
+    return clf
+
+
+def scored(clf):
+    """Patterns scored so far by a fake classifier."""
+    return sum(len(call.args[0]) for call in clf.predict_many.call_args_list)
+
+
+# -----------------------
+# 1. Second run is a hit and skips the scan
+# -----------------------
+def test_cache_hit_skips_scan(cache, btc_df):
+    first, _, status = cache.scan("BTCUSDT", btc_df, max_images=20)
+    assert status == "miss"
+
+    with patch.object(CupHandleDetector, "find_patterns") as scan:
+        second, _, status = cache.scan("BTCUSDT", btc_df, max_images=20)
+        scan.assert_not_called()
+    assert status == "hit"
+    assert second == first
+
+
+# -----------------------
+# 2. Appended bars only scan the tail
+# -----------------------
+def test_cache_prefix_matches_full_scan(cache, btc_df):
+    head = btc_df.iloc[:1000]
+    cache.scan("BTCUSDT", head, max_images=2000)
+
+    with patch("pattern_detector.compute_window_stats", wraps=compute_window_stats) as stats:
+        patterns, _, status = cache.scan("BTCUSDT", btc_df, max_images=2000)
+    assert status == "prefix"
+    assert len(stats.call_args.args[0]) == len(btc_df) - 1000 + MIN_BARS  # only windows reaching new bars
+    detector = CupHandleDetector(btc_df)
+    expected = attach_features(detector.find_patterns(max_images=2000), detector_features(detector))
+    pd.testing.assert_frame_equal(pd.DataFrame(patterns), pd.DataFrame(expected))
+
+
+# -----------------------
+# 3. Changed data or parameters → full scan
+# -----------------------
+def test_cache_miss_on_change(cache, btc_df):
+    cache.scan("BTCUSDT", btc_df, max_images=20)
+
+    changed = btc_df.copy()
+    changed.loc[5, "close"] += 1.0
+    assert cache.scan("BTCUSDT", changed, max_images=20)[2] == "miss"
+    assert cache.scan("BTCUSDT", btc_df, max_images=20, thresholds={"min_r2": 0.5})[2] == "miss"
+
+
+def test_cache_miss_on_code_change(btc_df, tmp_path):
+    sources = [tmp_path / "pattern_detector.py", tmp_path / "features.py"]
+    for source in sources:
+        source.write_text("# v1\n")
+    cache_dir = str(tmp_path / "cache")
+    ResultCache(cache_dir, code_sources=sources).scan("BTCUSDT", btc_df, max_images=5)
+    assert ResultCache(cache_dir, code_sources=sources).scan("BTCUSDT", btc_df, max_images=5)[2] == "hit"
+
+    sources[1].write_text("# v2\n")
+    assert ResultCache(cache_dir, code_sources=sources).scan("BTCUSDT", btc_df, max_images=5)[2] == "miss"
+
+
+# -----------------------
+# 4. Classifier scores cached per model version
+# -----------------------
+def test_cache_predictions(cache, btc_df, tmp_path):
+    clf = fake_classifier(tmp_path)
+    _, predictions, _ = cache.scan("BTCUSDT", btc_df, max_images=5, classifier=clf)
+    assert predictions == [(True, 0.9)] * 5
+    assert scored(clf) == 5
+
+    cache.scan("BTCUSDT", btc_df, max_images=5, classifier=clf)
+    assert scored(clf) == 5
+
+    (tmp_path / "model.pkl").write_bytes(b"model-v2")
+    cache.scan("BTCUSDT", btc_df, max_images=5, classifier=clf)
+    assert scored(clf) == 10
+
+
+# -----------------------
+# 5. Batch detection shares entries with per-symbol scans
+# -----------------------
+def test_scan_many_batches_misses(cache, tmp_path):
+    data = OHLCVData.read_csv("data/raw_data.csv")
+    frames = {symbol: data.symbol_frame(symbol) for symbol in data.symbols}
+    cache.scan("BTCUSDT", frames["BTCUSDT"], max_images=20)
+
+    detect_many = MagicMock(side_effect=lambda missed: batch_find_patterns(data, missed, max_images=20, features=True))
+    clf = fake_classifier(tmp_path)
+    results = cache.scan_many(frames, max_images=20, classifier=clf, detect_many=detect_many)
+    detect_many.assert_called_once_with(["ETHUSDT"])
+    assert {symbol: status for symbol, (_, _, status) in results.items()} == {"BTCUSDT": "hit", "ETHUSDT": "miss"}
+    assert clf.predict_many.call_count == 2  # one batched call per symbol
+
+    patterns, _, status = cache.scan("ETHUSDT", frames["ETHUSDT"], max_images=20)
+    assert status == "hit" and patterns == results["ETHUSDT"][0]
@@ -0,0 +1,91 @@
+# tests/test_scan.py
+
+import os
+import sys
+import subprocess
+import numpy as np
+import pandas as pd
+import pytest
+import talib
+import scan
+from main import profile_imports
+from data_prep import prepare_ohlcv
+from pattern_detector import CupHandleDetector, wilder_atr
+
+
+# -----------------------
+# Fixture: Real data
+# -----------------------
+@pytest.fixture(scope="module")
+def raw_df():
+    return pd.read_csv("data/raw_data.csv")
+
+
+# -----------------------
+# 1. NumPy ATR matches TA-Lib
+# -----------------------
+def test_wilder_atr_matches_talib(raw_df):
+    df = raw_df[raw_df["symbol"] == "BTCUSDT"]
+    high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+    expected = talib.ATR(high, low, close, timeperiod=14)
+    got = wilder_atr(high, low, close)
+    np.testing.assert_allclose(got, expected, rtol=1e-9, equal_nan=True)
+    assert np.isnan(wilder_atr(high[:10], low[:10], close[:10])).all()
+
+
+# -----------------------
+# 2. Scan-only path: same patterns as the detector
+# -----------------------
+def test_scan_matches_detector(raw_df):
+    series = scan.read_ohlcv_csv("data/raw_data.csv")
+    assert set(series) == {"BTCUSDT", "ETHUSDT"}
+    for symbol, arrays in series.items():
+        got = scan.scan_series(arrays, max_images=3000, start=20)
+        df = raw_df[raw_df["symbol"] == symbol].reset_index(drop=True)
+        expected = CupHandleDetector(df).find_patterns(max_images=3000, start=20)
+        assert [(p["cup_start"], p["invalid_reason"]) for p in got] == \
+               [(p["cup_start"], p["invalid_reason"]) for p in expected]
+
+
+def test_scan_prepares_messy_csv(raw_df, tmp_path):
+    df = raw_df.sample(frac=1, random_state=0)                # unsorted
+    df = pd.concat([df, df.iloc[:20]])                          # duplicate bars
+    df = df.drop(index=[101, 102, 103])                         # a gap
+    df.loc[df.index.isin([3, 500]), "close"] = np.nan           # empty fields in the CSV
+    df.loc[df.index == 600, "high"] = 1.0                       # inconsistent bar
+    path = tmp_path / "messy.csv"
+    df.to_csv(path, index=False)
+
+    series = scan.prepare_series(scan.read_ohlcv_csv(str(path)))
+    prepared, _ = prepare_ohlcv(pd.read_csv(path))
+    for symbol, arrays in series.items():
+        frame = prepared[prepared["symbol"] == symbol].reset_index(drop=True)
+        np.testing.assert_array_equal(arrays["bar_flags"], frame["bar_flags"].to_numpy())
+        np.testing.assert_allclose(arrays["close"], frame["close"].to_numpy(), rtol=1e-12)
+
+        got = scan.scan_series(arrays, max_images=3000)
+        expected = CupHandleDetector(frame).find_patterns(max_images=3000)
+        assert [(p["cup_start"], p["invalid_reason"]) for p in got] == \
+               [(p["cup_start"], p["invalid_reason"]) for p in expected]
+
+
+# -----------------------
+# 3. Start-up: scan-only loads no heavy dependency
+# -----------------------
+def test_scan_imports_are_light():
+    probe = "import sys, scan; print(','.join(m for m in ('pandas', 'talib', 'sklearn', 'matplotlib') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_entry_points_have_no_side_effects(tmp_path):
+    main_py = os.path.abspath("main.py")
+    for args in (["--help"], ["--import-only"], ["--scan-only", "--import-only"]):
+        subprocess.run([sys.executable, main_py, *args], cwd=tmp_path, capture_output=True, check=True)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_imports():
+    results = profile_imports(["scan-only"])
+    assert results["scan-only"]["heavy"] == []
+    assert results["scan-only"]["seconds"] > 0
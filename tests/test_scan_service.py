@@ -0,0 +1,121 @@
+# tests/test_scan_service.py
+
+import json
+import asyncio
+import urllib.request
+import urllib.error
+import pytest
+from unittest.mock import MagicMock
+from ohlcv_data import OHLCVData
+from pattern_detector import CupHandleDetector
+from pattern_store import PatternStore
+from scan_service import ScanService
+
+
+@pytest.fixture(scope="module")
+def data():
+    return OHLCVData.read_csv("data/raw_data.csv")
+
+
+def strict_json(raw):
+    """json.loads that rejects NaN/Infinity (not valid JSON)."""
+    def reject(constant):
+        raise ValueError(f"Invalid JSON constant: {constant}")
+    return json.loads(raw, parse_constant=reject)
+
+
+def request(base, method, path, body=None):
+    """Blocking HTTP call (run in an executor so the server loop keeps going)."""
+    raw = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=raw, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=10) as resp:
+            return resp.status, strict_json(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, strict_json(e.read())
+
+
+def run_with_service(service, calls):
+    """Start the service on an ephemeral localhost port and run blocking calls against it."""
+    async def scenario():
+        host, port = await service.start("127.0.0.1", 0)
+        base = f"http://{host}:{port}"
+        loop = asyncio.get_running_loop()
+        try:
+            return [await loop.run_in_executor(None, request, base, *call) for call in calls]
+        finally:
+            await service.close()
+    return asyncio.run(scenario())
+
+
+# -----------------------
+# 1. Health + scan match the detector
+# -----------------------
+def test_health_and_scan(data):
+    service = ScanService(data)
+    (status, health), (scan_status, scan) = run_with_service(service, [
+        ("GET", "/health"),
+        ("POST", "/scan", {"symbol": "BTCUSDT", "max_images": 5}),
+    ])
+    assert status == 200 and set(health["symbols"]) == {"BTCUSDT", "ETHUSDT"}
+    assert scan_status == 200
+
+    expected = CupHandleDetector(data.symbol_frame("BTCUSDT")).find_patterns(max_images=5)
+    assert [p["cup_start"] for p in scan["patterns"]] == [p["cup_start"] for p in expected]
+    assert [p["invalid_reason"] for p in scan["patterns"]] == [p["invalid_reason"] for p in expected]
+
+
+# -----------------------
+# 2. Scan restricted to recent bars
+# -----------------------
+def test_scan_recent_window(data):
+    service = ScanService(data)
+    frame = data.symbol_frame("ETHUSDT")
+    since = str(frame["timestamp"].iloc[-60])
+    ((status, scan),) = run_with_service(service, [("POST", "/scan", {"symbol": "ETHUSDT", "since": since})])
+    assert status == 200 and scan["count"] > 0
+    assert all(p["breakout_time"] >= since for p in scan["patterns"])
+
+
+# -----------------------
+# 3. Classify with the warm classifier
+# -----------------------
+def test_classify(data):
+    classifier = MagicMock()
+    classifier.predict_many.side_effect = lambda patterns: [(True, 0.8)] * len(patterns)
+    service = ScanService(data, classifier=classifier)
+    ((status, result),) = run_with_service(service, [
+        ("POST", "/classify", {"patterns": [{"cup_depth": 1.0}, {"cup_depth": 2.0}]}),
+    ])
+    assert status == 200
+    assert result["predictions"] == [{"ml_valid": True, "confidence": 0.8}] * 2
+    classifier.predict_many.assert_called_once()  # one batched model call
+
+
+# -----------------------
+# 4. Pattern store lookup
+# -----------------------
+def test_pattern_lookup(data, tmp_path):
+    db = str(tmp_path / "patterns.db")
+    with PatternStore(db) as store:
+        store.upsert([{"symbol": "BTCUSDT", "cup_start_time": "2024-01-01 00:00",
+                       "breakout_time": "2024-01-01 00:42", "cup_start": 0, "valid": True}])
+
+    service = ScanService(data, store_path=db)
+    ((status, result),) = run_with_service(service, [("GET", "/patterns?symbol=BTCUSDT&valid=true")])
+    assert status == 200 and result["count"] == 1
+    assert result["patterns"][0]["cup_start"] == 0
+    assert result["patterns"][0]["r2"] is None and result["patterns"][0]["confidence"] is None
+
+
+# -----------------------
+# 5. Errors are JSON responses
+# -----------------------
+def test_errors(data):
+    service = ScanService(data)
+    (unknown, _), (no_route, _), (no_clf, _) = run_with_service(service, [
+        ("POST", "/scan", {"symbol": "DOGEUSDT"}),
+        ("GET", "/nope"),
+        ("POST", "/classify", {"patterns": []}),
+    ])
+    assert (unknown, no_route, no_clf) == (404, 404, 503)
@@ -0,0 +1,68 @@
+# tests/test_threshold_sweep.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import r2_score
+from pattern_detector import CupHandleDetector, DEFAULT_THRESHOLDS, CUP_BARS
+from threshold_sweep import sweep_detector, sweep_thresholds
+
+
+# -----------------------
+# Fixture: Load real data (one symbol)
+# -----------------------
+@pytest.fixture(scope="module")
+def btc_detector():
+    df = pd.read_csv("data/raw_data.csv")
+    return CupHandleDetector(df[df["symbol"] == "BTCUSDT"])
+
+
+# -----------------------
+# 1. Vectorized R² matches sklearn
+# -----------------------
+def test_window_r2_matches_r2_score(btc_detector):
+    stats = btc_detector.window_stats()
+    close = btc_detector.df["close"].values
+    x = np.arange(CUP_BARS)
+    for i in [0, 100, len(stats["r2"]) - 1]:
+        y = close[i:i + CUP_BARS]
+        expected = r2_score(y, np.polyval(np.polyfit(x, y, 2), x))
+        assert stats["r2"][i] == pytest.approx(expected, abs=1e-9)
+
+
+# -----------------------
+# 2. Sweep agrees with find_patterns for each combination
+# -----------------------
+def test_sweep_matches_detector(btc_detector):
+    grid = {
+        "max_handle_retrace": [0.4, 1.0],
+        "min_breakout_atr": [0.0, 1.5],
+    }
+    results, patterns = sweep_detector(btc_detector, grid)
+    assert len(results) == 4
+    assert results["pass_count"].max() > 0
+
+    for k, row in results.iterrows():
+        thresholds = row.drop("pass_count").to_dict()
+        detector = CupHandleDetector(btc_detector.df, thresholds=thresholds)
+        found = detector.find_patterns(max_images=len(detector.df))
+        valid = [p["cup_start"] for p in found if p["valid"]]
+        assert valid == list(patterns[k])
+        assert row["pass_count"] == len(valid)
+
+
+# -----------------------
+# 3. Defaults used for thresholds missing from grid
+# -----------------------
+def test_sweep_defaults(btc_detector):
+    results, _ = sweep_thresholds(btc_detector.window_stats(), {"min_r2": [0.5]})
+    assert results.loc[0, "min_depth_ratio"] == DEFAULT_THRESHOLDS["min_depth_ratio"]
+    assert results.loc[0, "min_r2"] == 0.5
+
+
+# -----------------------
+# 4. Unknown threshold rejected
+# -----------------------
+def test_sweep_unknown_threshold(btc_detector):
+    with pytest.raises(ValueError):
+        sweep_thresholds(btc_detector.window_stats(), {"not_a_rule": [1]})
@@ -0,0 +1,118 @@
+import itertools
+import numpy as np
+import pandas as pd
+from pattern_detector import DEFAULT_THRESHOLDS
+
+# Threshold → (statistic, scale statistic, comparison that FAILS the rule).
+# A window fails when  stat <op> threshold * scale  (scale None → 1),
+# mirroring the checks in CupHandleDetector._validate_cup_handle.
+SWEEP_RULES = {
+    "min_depth_ratio": ("cup_depth", "avg_candle", "<"),
+    "max_rim_asymmetry": ("rim_asymmetry", None, ">"),
+    "max_handle_retrace": ("handle_depth", "cup_depth", ">"),
+    "min_r2": ("r2", None, "<"),
+    "min_breakout_atr": ("breakout_excess", "atr", "<"),
+    "min_volume_ratio": ("breakout_volume", "avg_handle_volume", "<"),
+}
+
+# Upper bound on booleans materialised per block (combinations × windows)
+MAX_BLOCK_CELLS = 32_000_000
+
+
+def _structural_mask(stats):
+    """Threshold-free checks every valid window must pass."""
+    return (
+        ~(stats["handle_high"] > stats["rim_high"])
+        & ~(stats["handle_low"] < stats["cup_low"])
+        & ~np.isnan(stats["atr"])
+        & ~(stats["breakout_excess"] <= 0)
+    )
+
+
+def _rule_masks(stats, name, values, window_slice):
+    """Pass mask of one rule for each of its threshold values: (len(values), n)."""
+    stat_key, scale_key, op = SWEEP_RULES[name]
+    if name == "min_volume_ratio" and not stats["has_volume"]:
+        n = window_slice.stop - window_slice.start
+        return np.ones((len(values), n), dtype=bool)
+
+    stat = stats[stat_key][window_slice][None, :]
+    limits = np.asarray(values, dtype=float)[:, None]
+    if scale_key is not None:
+        limits = limits * stats[scale_key][window_slice][None, :]
+
+    if op == "<":
+        return ~(stat < limits)
+    return ~(stat > limits)
+
+
+def sweep_thresholds(stats, grid, return_patterns=True):
+    """
+    Evaluate a grid of rule thresholds over precomputed window statistics.
+
+    Args:
+        stats: dict from CupHandleDetector.window_stats() / compute_window_stats().
+        grid: dict mapping threshold names (keys of DEFAULT_THRESHOLDS) to the
+            values to try. Thresholds not in the grid keep their default.
+        return_patterns: also return the passing cup_start indices per combination.
+
+    Returns:
+        (results, patterns): results is a DataFrame with one row per threshold
+        combination plus a 'pass_count' column; patterns is a list (same order)
+        of int arrays of passing cup_start indices, or None.
+    """
+    unknown = set(grid) - set(SWEEP_RULES)
+    if unknown:
+        raise ValueError(f"Unknown thresholds in grid: {sorted(unknown)}")
+
+    names = list(SWEEP_RULES)
+    values = [list(grid.get(name, [DEFAULT_THRESHOLDS[name]])) for name in names]
+    shape = tuple(len(v) for v in values)
+    n_combos = int(np.prod(shape))
+
+    starts = stats["cup_start"]
+    n_windows = len(starts)
+    structural = _structural_mask(stats)
+
+    pass_counts = np.zeros(n_combos, dtype=np.int64)
+    hits_combo, hits_window = [], []
+
+    # Evaluate blocks of windows so memory stays bounded for large grids
+    block = max(1, MAX_BLOCK_CELLS // max(n_combos, 1))
+    for lo in range(0, n_windows, block):
+        window_slice = slice(lo, min(lo + block, n_windows))
+        passed = structural[window_slice]
+
+        # Broadcast each rule along its own grid axis: (*shape, n_block)
+        for axis, name in enumerate(names):
+            masks = _rule_masks(stats, name, values[axis], window_slice)
+            expand = [1] * len(names)
+            expand[axis] = shape[axis]
+            passed = passed & masks.reshape(*expand, -1)
+
+        passed = passed.reshape(n_combos, -1)
+        pass_counts += passed.sum(axis=1)
+        if return_patterns:
+            combo_idx, window_idx = np.nonzero(passed)
+            hits_combo.append(combo_idx)
+            hits_window.append(starts[window_slice][window_idx])
+
+    combos = list(itertools.product(*values))
+    results = pd.DataFrame(combos, columns=names)
+    results["pass_count"] = pass_counts
+
+    patterns = None
+    if return_patterns:
+        combo_idx = np.concatenate(hits_combo) if hits_combo else np.empty(0, dtype=np.int64)
+        window_idx = np.concatenate(hits_window) if hits_window else np.empty(0, dtype=np.int64)
+        order = np.argsort(combo_idx, kind="stable")
+        combo_idx, window_idx = combo_idx[order], window_idx[order]
+        bounds = np.searchsorted(combo_idx, np.arange(n_combos + 1))
+        patterns = [window_idx[bounds[k]:bounds[k + 1]] for k in range(n_combos)]
+
+    return results, patterns
+
+
+def sweep_detector(detector, grid, return_patterns=True):
+    """Compute window statistics once for a detector and sweep the grid."""
+    return sweep_thresholds(detector.window_stats(), grid, return_patterns=return_patterns)
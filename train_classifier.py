@@ -1,17 +1,42 @@
 import argparse
 import pandas as pd
-from utils.pattern_classifier import PatternClassifier
+from utils.pattern_classifier import PatternClassifier, iter_report_batches
+from utils.model_selection import tune_classifier, SCORING
 
 def main():
     parser = argparse.ArgumentParser(description="Train Cup & Handle ML Classifier")
-    parser.add_argument("--report", type=str, required=True, help="Path to report.csv")
+    parser.add_argument("--report", type=str, nargs="+", required=True, help="Path(s) to report.csv")
     parser.add_argument("--out", type=str, default="models/cup_handle_model.pkl", help="Output model file")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stream the report(s) in chunks instead of loading them into memory")
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Rows per batch with --incremental")
+    parser.add_argument("--trees-per-batch", type=int, default=20, help="Trees added per batch with --incremental")
+    parser.add_argument("--reservoir-size", type=int, default=10_000,
+                        help="Rows kept per class for balancing with --incremental")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --incremental, add trees to the existing model at --out")
+    parser.add_argument("--tune", action="store_true",
+                        help="Purged walk-forward CV + parallel grid search; saves the best model")
+    parser.add_argument("--splits", type=int, default=5, help="Walk-forward folds with --tune")
+    parser.add_argument("--scoring", type=str, default="roc_auc", choices=SCORING, help="Metric used to pick the best model")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel fits with --tune (-1 = all cores)")
+    parser.add_argument("--cv-results", type=str, default=None, help="Write per-fold metrics to this CSV")
     args = parser.parse_args()
 
+    if args.incremental:
+        clf = PatternClassifier(model_path=args.out)
+        clf.train_incremental(
+            iter_report_batches(args.report, chunksize=args.chunksize),
+            trees_per_batch=args.trees_per_batch,
+            reservoir_size=args.reservoir_size,
+            resume=args.resume,
+        )
+        return
+
     # -------------------------------
     # Step 1: Load dataset
     # -------------------------------
-    df = pd.read_csv(args.report)
+    df = pd.concat([pd.read_csv(path) for path in args.report], ignore_index=True)
 
     if "valid" not in df.columns:
         raise ValueError("❌ 'valid' column not found in report.csv. Please run main.py first.")
@@ -31,6 +56,16 @@ def main():
     # -------------------------------
     # Step 3: Train + Save Model
     # -------------------------------
+    if args.tune:
+        results, _ = tune_classifier(
+            df, n_splits=args.splits, scoring=args.scoring, n_jobs=args.jobs, model_path=args.out
+        )
+        print("📊 Per-fold results:")
+        print(results.to_string(index=False))
+        if args.cv_results:
+            results.to_csv(args.cv_results, index=False)
+        return
+
     clf = PatternClassifier(model_path=args.out)
     clf.train(df)  # trains and saves automatically
 
@@ -0,0 +1,158 @@
+# utils/model_selection.py
+
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterGrid
+from sklearn.metrics import roc_auc_score, balanced_accuracy_score, precision_score, recall_score, f1_score
+from utils.pattern_classifier import TARGET, MODEL_FILE
+from features import feature_set, feature_matrix
+
+# Candidate hyperparameters for the RandomForest (class_weight="balanced" as in train())
+PARAM_GRID = {
+    "n_estimators": [100, 200],
+    "max_depth": [None, 8],
+    "min_samples_leaf": [1, 5],
+}
+SCORING = ["roc_auc", "balanced_accuracy", "precision", "recall", "f1"]
+
+
+def _time_column(df: pd.DataFrame, time_col: str, index_col: str) -> np.ndarray:
+    """
+    Pattern times as int64: timestamps when present, otherwise bar indices.
+    Bar indices are per-symbol positions, not a shared timeline, so they are
+    only used for single-symbol reports.
+    """
+    if time_col in df.columns:
+        return pd.to_datetime(df[time_col]).astype("datetime64[ns]").astype("int64").to_numpy()
+    if "symbol" in df.columns and df["symbol"].nunique() > 1:
+        raise ValueError(
+            f"Report has several symbols but no '{time_col}' column; bar indices "
+            f"('{index_col}') are not comparable across symbols."
+        )
+    return df[index_col].to_numpy(dtype=np.int64)
+
+
+def purged_walk_forward_splits(df: pd.DataFrame, n_splits: int = 5):
+    """
+    Walk-forward splits ordered by cup start time.
+
+    Patterns are cut into n_splits + 1 consecutive time blocks; fold k tests on
+    block k + 1 and trains on earlier patterns only. Training patterns whose
+    window (cup start → breakout) reaches into the test block are purged, so
+    overlapping windows never straddle train and test.
+
+    Uses cup_start_time / breakout_time when present, cup_start / breakout
+    otherwise (single-symbol reports only; ValueError for several symbols).
+
+    Yields:
+        (train_idx, test_idx) positional index arrays.
+    """
+    start = _time_column(df, "cup_start_time", "cup_start")
+    if "breakout_time" in df.columns or "breakout" in df.columns:
+        end = _time_column(df, "breakout_time", "breakout")
+    else:
+        end = start
+
+    # Block boundaries at equal pattern counts; ties stay in one block
+    sorted_start = np.sort(start, kind="stable")
+    cuts = np.linspace(0, len(start), n_splits + 2).astype(int)[1:-1]
+    bounds = np.unique(sorted_start[np.minimum(cuts, len(start) - 1)])
+    bounds = np.append(bounds, np.iinfo(np.int64).max)
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        test_idx = np.flatnonzero((start >= lo) & (start < hi))
+        train_idx = np.flatnonzero(end < lo)
+        yield train_idx, test_idx
+
+
+def _scores(y_true, y_pred, y_prob) -> dict:
+    scores = {
+        "balanced_accuracy": balanced_accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "f1": f1_score(y_true, y_pred, zero_division=0),
+    }
+    # AUC is undefined when the test block holds a single class
+    scores["roc_auc"] = roc_auc_score(y_true, y_prob) if len(np.unique(y_true)) == 2 else np.nan
+    return scores
+
+
+def _fit_fold(estimator, params, fold, data):
+    X_train, y_train, X_test, y_test = data
+    model = clone(estimator).set_params(**params)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - t0
+
+    y_prob = model.predict_proba(X_test)[:, list(model.classes_).index(1)]
+    y_pred = (y_prob >= 0.5).astype(int)
+    return {
+        "params": params, "fold": fold,
+        "n_train": len(y_train), "n_test": len(y_test),
+        "fit_time": fit_time, **_scores(y_test, y_pred, y_prob),
+    }
+
+
+def tune_classifier(df: pd.DataFrame, param_grid: dict = None, n_splits: int = 5,
+                    scoring: str = "roc_auc", n_jobs: int = -1, random_state: int = 42,
+                    model_path: str = MODEL_FILE):
+    """
+    Purged walk-forward CV + grid search, fitted in parallel over (candidate, fold).
+
+    Feature matrices are built once per fold and shared by every candidate
+    (joblib memory-maps them for worker processes). The best candidate by mean
+    `scoring` is refit on all patterns and saved to model_path as a plain
+    RandomForestClassifier, so PatternClassifier.load()/predict() use it as-is.
+
+    Returns:
+        (results, best_params): results has one row per candidate and fold.
+    """
+    if scoring not in SCORING:
+        raise ValueError(f"Unknown scoring '{scoring}'; choose one of {SCORING}")
+    names, version = feature_set(df.columns)
+    X = feature_matrix(df, names, version)
+    y = df[TARGET].astype(int).to_numpy()
+
+    folds = []
+    for train_idx, test_idx in purged_walk_forward_splits(df, n_splits):
+        if len(np.unique(y[train_idx])) < 2 or len(test_idx) == 0:
+            continue  # early folds may not have seen both classes yet
+        folds.append((X[train_idx], y[train_idx], X[test_idx], y[test_idx]))
+    if not folds:
+        raise ValueError("No walk-forward fold has both Valid and Invalid patterns in training.")
+
+    estimator = RandomForestClassifier(random_state=random_state, class_weight="balanced", n_jobs=1)
+    candidates = list(ParameterGrid(param_grid or PARAM_GRID))
+    print(f"🔎 Tuning {len(candidates)} candidates × {len(folds)} folds")
+
+    rows = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_fold)(estimator, params, k, data)
+        for params in candidates
+        for k, data in enumerate(folds)
+    )
+    results = pd.DataFrame(rows)
+    results["candidate"] = results["params"].map(repr)
+
+    summary = results.groupby("candidate", sort=False)[SCORING + ["fit_time"]].mean()
+    best = summary[scoring].idxmax() if summary[scoring].notna().any() else summary.index[0]
+    best_params = candidates[list(summary.index).index(best)]
+    print("📊 Mean scores per candidate:")
+    print(summary.round(4).to_string())
+    print(f"🏆 Best ({scoring}): {best_params}")
+
+    # Refit on all patterns and save in the existing model format
+    model = clone(estimator).set_params(**best_params, n_jobs=n_jobs)
+    model.fit(X, y)
+    model.set_params(n_jobs=None)
+    model.feature_names_, model.feature_version_ = names, version
+    os.makedirs(os.path.dirname(model_path) or ".", exist_ok=True)
+    joblib.dump(model, model_path)
+    print(f"✅ Model saved to {model_path}")
+
+    return results.drop(columns="candidate"), best_params
@@ -7,6 +7,7 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
+from features import feature_set, feature_matrix, model_features
 
 # Optional oversampling
 try:
@@ -18,6 +19,79 @@ except ImportError:
 MODEL_DIR = "models"
 MODEL_FILE = os.path.join(MODEL_DIR, "cup_handle_model.pkl")
 
+TARGET = "valid"
+
+
+def iter_report_batches(paths, chunksize: int = 50_000):
+    """
+    Stream (X, y) batches from one or more report.csv files without loading them whole.
+    X is a DataFrame of the newest feature set present in the reports.
+
+    Every report's header is checked before the first batch is yielded; a
+    report whose feature set differs from the first one's (another
+    FEATURE_VERSION, or missing columns) raises ValueError naming the file.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    names = None
+    for path in paths:
+        try:
+            path_names, path_version = feature_set(pd.read_csv(path, nrows=0).columns)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+        if names is None:
+            names, version = path_names, path_version
+        elif path_names != names:
+            raise ValueError(
+                f"{path} has feature set v{path_version} but {paths[0]} has v{version}; "
+                "train on reports with the same feature set."
+            )
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=names + [TARGET], chunksize=chunksize):
+            chunk = chunk.dropna(subset=[TARGET])
+            y = chunk[TARGET].astype(str).str.lower().isin(["true", "1"]).astype(int).values
+            yield chunk[names], y
+
+
+class ReservoirSampler:
+    """
+    Fixed-size uniform sample of a stream of feature rows
+    (reservoir sampling, applied a batch at a time with NumPy).
+    """
+
+    def __init__(self, size: int, n_features: int, random_state=None):
+        self.size = size
+        self.rows = np.empty((size, n_features))
+        self.count = 0   # rows currently held (≤ size)
+        self.seen = 0    # rows offered so far
+        self.rng = np.random.default_rng(random_state)
+
+    def add(self, X: np.ndarray):
+        X = np.asarray(X, dtype=float)
+
+        # Fill free slots first
+        free = min(self.size - self.count, len(X))
+        if free > 0:
+            self.rows[self.count:self.count + free] = X[:free]
+            self.count += free
+
+        # Row at stream position t replaces a random slot with probability size / t
+        rest = X[free:]
+        if len(rest):
+            positions = self.seen + free + np.arange(1, len(rest) + 1)
+            slots = (self.rng.random(len(rest)) * positions).astype(np.int64)
+            keep = slots < self.size
+            self.rows[slots[keep]] = rest[keep]
+        self.seen += len(X)
+
+    def sample(self, n: int) -> np.ndarray:
+        """n rows from the reservoir (with replacement only if n > rows held)."""
+        if self.count == 0 or n <= 0:
+            return self.rows[:0]
+        idx = self.rng.choice(self.count, size=n, replace=n > self.count)
+        return self.rows[idx]
+
+
 class PatternClassifier:
     def __init__(self, model_path: str = MODEL_FILE):
         self.model_path = model_path
@@ -27,12 +101,11 @@ class PatternClassifier:
         """
         Train the classifier using features from report.csv.
         Automatically balances classes if imbalanced.
+        Uses the newest feature set the report has (see features.feature_set).
         """
-        features = ["cup_depth", "cup_duration", "handle_depth", "handle_duration", "r2"]
-        target = "valid"
-
-        X = df[features].fillna(0).values
-        y = df[target].astype(int).values  # convert True/False → 1/0
+        names, version = feature_set(df.columns)
+        X = feature_matrix(df, names, version)
+        y = df[TARGET].astype(int).values  # convert True/False → 1/0
 
         # Handle class imbalance with oversampling
         if IMBLEARN_AVAILABLE:
@@ -51,6 +124,7 @@ class PatternClassifier:
             n_estimators=200, random_state=42, class_weight="balanced"
         )
         clf.fit(X_train, y_train)
+        clf.feature_names_, clf.feature_version_ = names, version
 
         # Evaluate
         y_pred = clf.predict(X_test)
@@ -64,6 +138,68 @@ class PatternClassifier:
 
         self.model = clf
 
+    def train_incremental(self, batches, trees_per_batch: int = 20, reservoir_size: int = 10_000,
+                          resume: bool = False, random_state: int = 42):
+        """
+        Train out-of-core from a stream of (X, y) batches (see iter_report_batches);
+        X is a DataFrame whose columns name the feature set.
+
+        Each batch grows the forest by `trees_per_batch` trees (warm start).
+        Classes are balanced per batch with per-class reservoir samples of the
+        whole stream seen so far, so no oversampled copy is ever materialised.
+        With resume=True, trees are added to the existing model at model_path.
+        The saved model is a plain RandomForestClassifier, as with train().
+        """
+        if resume and os.path.exists(self.model_path):
+            clf = joblib.load(self.model_path)
+            clf.set_params(warm_start=True)
+        else:
+            clf = RandomForestClassifier(n_estimators=0, warm_start=True, random_state=random_state)
+
+        names = version = reservoirs = None
+        n_batches = 0
+        for X, y in batches:
+            if names is None:
+                names, version = feature_set(X.columns)
+                if resume and clf.n_estimators and model_features(clf)[0] != names:
+                    raise ValueError(f"Model at {self.model_path} was trained on other features; cannot resume.")
+                reservoirs = {
+                    label: ReservoirSampler(reservoir_size, len(names), random_state=random_state + label)
+                    for label in (0, 1)
+                }
+            X = feature_matrix(X, names, version)
+            for label, reservoir in reservoirs.items():
+                reservoir.add(X[y == label])
+            if any(r.count == 0 for r in reservoirs.values()):
+                continue  # need both classes before trees can be grown
+
+            # Balanced batch: each class gets as many rows as the larger class in
+            # this batch, its own batch rows first, topped up from its reservoir
+            target_rows = max(np.bincount(y, minlength=2).max(), 1)
+            X_parts, y_parts = [], []
+            for label, reservoir in reservoirs.items():
+                own = X[y == label][:target_rows]
+                extra = reservoir.sample(target_rows - len(own))
+                X_parts += [own, extra]
+                y_parts.append(np.full(len(own) + len(extra), label))
+
+            clf.n_estimators += trees_per_batch
+            clf.fit(np.vstack(X_parts), np.concatenate(y_parts))
+            n_batches += 1
+            print(f"🌲 Batch {n_batches}: {len(y)} rows, forest size {clf.n_estimators}")
+
+        if n_batches == 0:
+            raise ValueError("No batch contained both Valid and Invalid patterns; nothing trained.")
+
+        clf.set_params(warm_start=False)
+        clf.feature_names_, clf.feature_version_ = names, version
+        os.makedirs(os.path.dirname(self.model_path) or ".", exist_ok=True)
+        joblib.dump(clf, self.model_path)
+        print(f"✅ Model saved to {self.model_path}")
+
+        self.model = clf
+        return clf
+
     def load(self):
         """Load trained model from disk."""
         if not os.path.exists(self.model_path):
@@ -76,18 +212,24 @@ class PatternClassifier:
         Predict validity of a single pattern.
         Returns: (prediction: bool, confidence: float)
         """
+        return self.predict_many([pattern])[0]
+
+    def predict_many(self, patterns: list) -> list:
+        """
+        Predict validity of many patterns with one feature matrix and one
+        model call (e.g. all patterns of a symbol).
+        Returns: list of (prediction: bool, confidence: float), aligned with patterns.
+        """
+        if not patterns:
+            return []
         if self.model is None:
             self.load()
 
-        features = np.array([[ 
-            pattern.get("cup_depth", 0),
-            pattern.get("cup_duration", 0),
-            pattern.get("handle_depth", 0),
-            pattern.get("handle_duration", 0),
-            pattern.get("r2", 0)
-        ]])
-
-        probs = self.model.predict_proba(features)[0]
-        pred = self.model.predict(features)[0]
-        confidence = probs[pred]
-        return bool(pred), float(confidence)
+        # Columns the model was trained on; pre-versioning models use the legacy five
+        names, version = model_features(self.model)
+        features = feature_matrix(patterns, names, version)
+
+        probs = self.model.predict_proba(features)
+        preds = probs.argmax(axis=1)
+        labels = self.model.classes_[preds]
+        return [(bool(label), float(p[k])) for label, p, k in zip(labels, probs, preds)]